@@ -0,0 +1,310 @@
+"""
+bench_config_log.py: Benchmark config_log throughput, per-call latency, and memory for each handler mode.
+
+PURPOSE: Catch logging regressions (slower calls, lower throughput, more memory) before they reach production.
+
+Each benchmark configures a logger with config_log.setup(), produces records, then tears the configuration down;
+the measured time runs until every record has been written (async listeners and the multiprocess collector are
+drained), so records/s is end-to-end throughput while latency is the time a logging call blocks its caller.
+Memory is measured in a separate, shorter pass under tracemalloc, so tracing does not distort the timings.
+
+Scenarios:
+  - stderr      -- info records to stderr (redirected to os.devnull while measured)
+  - file        -- info records to a log file
+  - fyi_alert   -- debug/info/warning/error records, split between the fyi and alert handlers
+  - exc_info    -- error records with tracebacks (exc_info=True)
+  - threads     -- info records from several threads (--threads)
+  - processes   -- info records from several processes (--processes)
+  - context     -- info records carrying bound context fields (request id, tenant, worker), rebound every
+                   REQUEST_RECORDS records; compare with 'message_ids' and 'file' for the per-call overhead
+  - message_ids -- info records with the same ids formatted into each message instead
+
+USAGE:
+  - py bench_config_log.py                                    -- all scenarios and modes, JSON to stdout
+  - py bench_config_log.py --records 50000 --output bench.json
+  - py bench_config_log.py --scenarios file exc_info --modes sync async
+  - py bench_config_log.py --compare bench.json --tolerance 0.2  -- exit status 1 if records/s fell by more than 20%
+
+OUTPUT:
+  - JSON: {"environment": {...}, "parameters": {...}, "results": [{"scenario", "mode", "records", "elapsed_s",
+    "records_per_s", "latency_ns": {"p50", "p90", "p99", "p999", "max"}, "memory_peak_bytes"}, ...]}
+    plus, with --compare, "regressions": [...]
+
+REFERENCES:
+  - time.perf_counter_ns -- See https://docs.python.org/3/library/time.html#time.perf_counter_ns
+  - tracemalloc -- See https://docs.python.org/3/library/tracemalloc.html
+  - argparse -- See https://docs.python.org/3/library/argparse.html
+"""
+
+
+import argparse
+import array
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import config_log
+
+
+SCENARIOS = ('stderr', 'file', 'fyi_alert', 'exc_info', 'threads', 'processes', 'context', 'message_ids')
+PERCENTILES = (('p50', 50), ('p90', 90), ('p99', 99), ('p999', 99.9))
+MESSAGE = 'BENCH INFO: record %d of a reproducible config_log benchmark run.'
+REQUEST_RECORDS = 100  # records logged per request in the 'context' and 'message_ids' scenarios
+
+
+def get_cli_help() -> argparse.Namespace:
+    """
+    Setup configuration of command line interface parameters
+
+    PURPOSE: Improve command line interface usability of module.
+
+    USAGE:
+     - At command line: py bench_config_log.py -h
+
+    INPUT: None
+
+    OUTPUT:
+     - displays command line help and usage instructions (i.e. prints to stdout)
+
+    REFERENCES:
+  - argparse -- See https://docs.python.org/3/library/argparse.html
+    """
+    parser = argparse.ArgumentParser(
+        prog='bench_config_log',
+        description='Benchmark config_log throughput, latency, and memory for each handler mode.'
+    )
+    parser.add_argument('--records', type=int, default=20000,
+                        help='records produced per benchmark (default 20000)')
+    parser.add_argument('--memory-records', type=int, default=2000, dest='memory_records',
+                        help='records produced per benchmark in the tracemalloc pass (default 2000, 0 skips it)')
+    parser.add_argument('--threads', type=int, default=4,
+                        help='producer threads for the "threads" scenario (default 4)')
+    parser.add_argument('--processes', type=int, default=4,
+                        help='producer processes for the "processes" scenario (default 4)')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS),
+                        help='scenarios to run (default all)')
+    parser.add_argument('--modes', nargs='+', choices=config_log.MODES, default=list(config_log.MODES),
+                        help='setup() modes to run (default all)')
+    parser.add_argument('--output', help='JSON results file (default stdout)')
+    parser.add_argument('--compare', help='baseline JSON results file to compare records/s against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed records/s drop versus --compare, as a fraction (default 0.2)')
+    return parser.parse_args()
+
+
+def _produce(logger, scenario: str, start: int, count: int, latencies: array.array) -> None:
+    """
+    Log count records for scenario, appending each call's latency (ns) to latencies.
+    """
+    clock = time.perf_counter_ns
+    if scenario == 'exc_info':
+        for i in range(start, start + count):
+            try:
+                raise ValueError(f'bench failure {i}')
+            except ValueError:
+                before = clock()
+                logger.error(MESSAGE, i, exc_info=True)
+                latencies.append(clock() - before)
+    elif scenario == 'context':
+        for request in range(start, start + count, REQUEST_RECORDS):
+            with config_log.bound(request_id=f'req-{request}', tenant='acme', worker=os.getpid()):
+                for i in range(request, min(request + REQUEST_RECORDS, start + count)):
+                    before = clock()
+                    logger.info(MESSAGE, i)
+                    latencies.append(clock() - before)
+    elif scenario == 'message_ids':
+        for request in range(start, start + count, REQUEST_RECORDS):
+            request_id, tenant, worker = f'req-{request}', 'acme', os.getpid()
+            for i in range(request, min(request + REQUEST_RECORDS, start + count)):
+                before = clock()
+                logger.info('[request_id=%s tenant=%s worker=%s] ' + MESSAGE, request_id, tenant, worker, i)
+                latencies.append(clock() - before)
+    elif scenario == 'fyi_alert':
+        levels = (config_log.logging.DEBUG, config_log.logging.INFO,
+                  config_log.logging.WARNING, config_log.logging.ERROR)
+        for i in range(start, start + count):
+            before = clock()
+            logger.log(levels[i & 3], MESSAGE, i)
+            latencies.append(clock() - before)
+    else:
+        for i in range(start, start + count):
+            before = clock()
+            logger.info(MESSAGE, i)
+            latencies.append(clock() - before)
+
+
+def _process_producer(logger_name: str, logfile: str, mode: str, start: int, count: int,
+                      trace_memory: bool, results: multiprocessing.Queue) -> None:
+    """
+    Child process of the 'processes' scenario: configure logging, produce, and report latencies and memory.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    logger = config_log.setup(logger_name, logfile, mode=mode)
+    latencies = array.array('q')
+    _produce(logger, 'processes', start, count, latencies)
+    config_log.teardown(logger_name)
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    results.put((latencies.tobytes(), peak))
+
+
+def _percentiles(latencies: array.array) -> dict:
+    """
+    Return the latency percentiles (ns) of latencies.
+    """
+    ordered = sorted(latencies)
+    if not ordered:
+        return {}
+    stats = {name: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for name, p in PERCENTILES}
+    stats['max'] = ordered[-1]
+    return stats
+
+
+def run_benchmark(scenario: str, mode: str, records: int, threads: int = 4, processes: int = 4,
+                  trace_memory: bool = False) -> dict:
+    """
+    Run one benchmark and return its results.
+
+    INPUT:
+      - scenario (str) = one of SCENARIOS
+      - mode (str) = config_log.setup() mode
+      - records (int) = records produced, in total over all producers
+      - threads (int)(optional) = producer threads for the 'threads' scenario (default 4)
+      - processes (int)(optional) = producer processes for the 'processes' scenario (default 4)
+      - trace_memory (bool)(optional) = measure peak traced memory (default False); timings are then distorted
+
+    OUTPUT:
+      - dict: scenario, mode, records, elapsed_s, records_per_s, latency_ns, memory_peak_bytes
+    """
+    directory = tempfile.mkdtemp(prefix='bench_config_log_')
+    logfile = None if scenario == 'stderr' else os.path.join(directory, 'bench.log')
+    logger_name = f'bench.{scenario}.{mode}'
+    latencies = array.array('q')
+    peaks = []
+    saved_stderr = None
+    collector = None
+    if scenario == 'stderr':  # the stream handlers write to sys.stderr: point fd 2 at os.devnull
+        sys.stderr.flush()
+        saved_stderr = os.dup(2)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 2)
+        os.close(devnull)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        if mode == 'multiprocess':  # started outside the measured time, like a long-lived collector
+            collector = config_log.start_collector(logfile)
+        began = time.perf_counter()
+        if scenario == 'processes':
+            context = multiprocessing.get_context()
+            results = context.Queue()
+            share = records // processes
+            workers = [context.Process(target=_process_producer,
+                                       args=(logger_name, logfile, mode, n * share, share, trace_memory, results))
+                       for n in range(processes)]
+            for worker in workers:
+                worker.start()
+            for _ in workers:
+                data, peak = results.get()
+                latencies.frombytes(data)
+                peaks.append(peak)
+            for worker in workers:
+                worker.join()
+        else:
+            logger = config_log.setup(logger_name, logfile, mode=mode)
+            if scenario == 'threads':
+                share = records // threads
+                per_thread = [array.array('q') for _ in range(threads)]
+                producers = [threading.Thread(target=_produce, args=(logger, scenario, n * share, share, lats))
+                             for n, lats in enumerate(per_thread)]
+                for producer in producers:
+                    producer.start()
+                for producer in producers:
+                    producer.join()
+                for lats in per_thread:
+                    latencies.extend(lats)
+            else:
+                _produce(logger, scenario, 0, records, latencies)
+            config_log.teardown(logger_name)
+        if collector is not None:
+            collector.stop()
+        elapsed = time.perf_counter() - began
+        if trace_memory:
+            peaks.append(tracemalloc.get_traced_memory()[1])
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        if saved_stderr is not None:
+            os.dup2(saved_stderr, 2)
+            os.close(saved_stderr)
+        config_log.teardown(logger_name)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        'scenario': scenario,
+        'mode': mode,
+        'records': len(latencies),
+        'elapsed_s': round(elapsed, 6),
+        'records_per_s': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'latency_ns': _percentiles(latencies),
+        'memory_peak_bytes': max((peak for peak in peaks if peak is not None), default=None),
+    }
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """
+    Return the results whose records/s fell by more than tolerance (a fraction) versus the baseline results.
+    """
+    before = {(r['scenario'], r['mode']): r['records_per_s'] for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = before.get((result['scenario'], result['mode']))
+        if old and result['records_per_s'] is not None and result['records_per_s'] < old * (1 - tolerance):
+            regressions.append({'scenario': result['scenario'], 'mode': result['mode'],
+                                'baseline_records_per_s': old, 'records_per_s': result['records_per_s']})
+    return regressions
+
+
+if __name__ == '__main__':
+    args = get_cli_help()
+
+    results = []
+    for scenario in args.scenarios:
+        for mode in args.modes:
+            if scenario == 'stderr' and mode == 'multiprocess':
+                continue  # the multiprocess collector writes to a log file only
+            result = run_benchmark(scenario, mode, args.records, args.threads, args.processes)
+            if args.memory_records:
+                memory = run_benchmark(scenario, mode, args.memory_records, args.threads, args.processes,
+                                       trace_memory=True)
+                result['memory_peak_bytes'] = memory['memory_peak_bytes']
+                result['memory_records'] = memory['records']
+            results.append(result)
+            print(f"{scenario:>10} {mode:>12}: {result['records_per_s']:>12,.0f} records/s"
+                  f"  p99 {result['latency_ns'].get('p99', 0) / 1000:,.1f} µs", file=sys.stderr)
+
+    report = {
+        'environment': {'python': sys.version, 'implementation': platform.python_implementation(),
+                        'platform': platform.platform(), 'cpu_count': os.cpu_count()},
+        'parameters': {'records': args.records, 'memory_records': args.memory_records,
+                       'threads': args.threads, 'processes': args.processes},
+        'results': results,
+    }
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            report['regressions'] = compare(results, json.load(baseline_file), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(text + '\n')
+    else:
+        print(text)
+    sys.exit(1 if report.get('regressions') else 0)
@@ -5,21 +5,60 @@ PURPOSE: Store or view helpful information for testing and debugging.
 
 USAGE: 
   - Testing: py config_log.py
+  - Query:   py config_log.py query LOGFILE [--since TIME] [--until TIME] [--level LEVEL] [--logger NAME]
+  - Recover: py config_log.py recover LOGFILE.ring [--since TIME] -- flight recorder records, e.g. after a crash
+  - Compact: py config_log.py compact LOGFILE|DIRECTORY ... --output MERGED.gz -- merge and summarize log files
   - Import: from config_log import setup
             logger = setup(logger_name, logfile_path_name) -- see setup function use notes below
+            logger = setup(logger_name, logfile_path_name, mode='async') -- non-blocking, queue-backed logging
+            logger = setup(logger_name, logfile_path_name, mode='asyncio'); await aflush() / ateardown()
+            collector = start_collector(logfile_path_name) -- in the parent of a process pool, then in each worker:
+            logger = setup(logger_name, logfile_path_name, mode='multiprocess') -- ship records to the collector
+            logger = setup(logger_name, logfile_path_name, output_format='json') -- one JSON record per line
+            for record in read_records(logfile_path_name): … -- stream-decode a 'json' or 'binary' log file
+            reconfigure(logger_name, ...) / teardown(logger_name) -- change or remove a setup() configuration
+            watcher = watch_config('logging.json', signum=signal.SIGHUP) -- reconfigure live from a JSON file
+            logger = setup(logger_name, logfile_path_name, flight_recorder_bytes=1 << 20) -- debug/info kept in
+                     a ring buffer, written to the log file only ahead of warning/error/critical records
+            logger = setup(logger_name, logfile_path_name, metrics=True); get_metrics(logger_name) -- self-metrics
+            logger = setup(logger_name, logfile_path_name, level='INFO') -- or CONFIG_LOG_LEVEL=INFO; debug
+            logger.debug('state: %s', lazy(describe_state)) -- describe_state() only runs when DEBUG is enabled
+            with bound(request_id=rid, tenant=tenant): … -- records logged in the block (thread or asyncio
+                     task) carry the fields, shown by %(context)s; or token = bind(...) … unbind(token)
 
 REFERENCES:
   - logging -- See https://docs.python.org/3/library/logging.html
+  - logging.handlers -- See https://docs.python.org/3/library/logging.handlers.html
+  - contextvars -- See https://docs.python.org/3/library/contextvars.html
+  - multiprocessing -- used for the 'multiprocess' mode collector only.
+                       See https://docs.python.org/3/library/multiprocessing.html
   - argparse -- used for command line only, not required for import use.
                 See https://docs.python.org/3/library/argparse.html
 """
 
 
+import atexit
+import builtins
+import contextvars
+import itertools
 import logging
-import argparse
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import traceback
+import zlib
+from collections.abc import Iterator
+
+# Modules that only some features (or the command line) use are imported where those features start, to
+# keep 'from config_log import setup' fast; see bench_import_time.py.
 
 
 def get_cli_help():
+    import argparse
+
     parser = argparse.ArgumentParser(
         prog='config_log',
         description='Create logging configuration to file or stderr'
@@ -43,122 +82,3707 @@ def get_cli_help():
                         dest='logfile_path_name',
                         help='optional logging file\'s path and name (e.g. \'D:\\path\\file.log\')'
     )
-    return parser.parse_args()
+    parser.add_argument('--mode',
+                        required=False, action='store', type=str,
+                        choices=MODES, default='sync',
+                        dest='mode',
+                        help='optional handler mode: sync (default), async (queue-backed, non-blocking),'
+                             ' asyncio (async for event loop programs), or multiprocess (records shipped'
+                             ' to a collector process)'
+    )
+    subparsers = parser.add_subparsers(dest='command', title='subcommands')
+    parser_query = subparsers.add_parser(
+        'query',
+        help='stream matching records from a text log file, using a sidecar index (LOGFILE.idx)',
+        description='Stream records matching a time range, level and/or logger name from a log file'
+                    ' written in the fmt_fyi/fmt_alert text layout. A sidecar index (LOGFILE.idx) of'
+                    ' record offsets, timestamps and levels is built on first use and extended'
+                    ' incrementally afterwards.'
+    )
+    parser_query.add_argument('query_logfile', metavar='LOGFILE',
+                              help='logging file\'s path and name'
+    )
+    parser_query.add_argument('--since', required=False, action='store', type=str, dest='since',
+                              help='optional earliest record time, ISO format (e.g. \'2024-05-01 13:00:00\')'
+    )
+    parser_query.add_argument('--until', required=False, action='store', type=str, dest='until',
+                              help='optional latest record time (exclusive), ISO format'
+    )
+    parser_query.add_argument('--level', required=False, action='store', type=str, dest='level',
+                              help='optional minimum level name (e.g. WARNING)'
+    )
+    parser_query.add_argument('--logger', required=False, action='store', type=str, dest='logger_name',
+                              help='optional logger name (exact match)'
+    )
+    parser_recover = subparsers.add_parser(
+        'recover',
+        help='print the records held in a flight recorder ring file (LOGFILE.ring), e.g. after a crash',
+        description='Print the debug/info records held in a flight recorder ring file, oldest first,'
+                    ' as they would have been written to the log file.'
+    )
+    parser_recover.add_argument('ring_file', metavar='RINGFILE',
+                                help='flight recorder ring file\'s path and name (e.g. \'D:\\path\\file.log.ring\')'
+    )
+    parser_recover.add_argument('--since', required=False, action='store', type=str, dest='since',
+                                help='optional earliest record time, ISO format (e.g. \'2024-05-01 13:00:00\')'
+    )
+    parser_compact = subparsers.add_parser(
+        'compact',
+        help='merge many text log files into one compressed, time-ordered file, and summarize them',
+        description='Parse text layout log files (plain or rotated .gz/.zst segments) in parallel, merge'
+                    ' their records by time, shorten repeated alert blocks, write one compressed file,'
+                    ' and print counts by level, logger and exception type as JSON.'
+    )
+    parser_compact.add_argument('compact_logfiles', metavar='LOGFILE', nargs='+',
+                                help='logging files\' paths and names, or directories of logging files'
+    )
+    parser_compact.add_argument('--output', required=True, action='store', type=str, dest='output',
+                                help='merged logging file\'s path and name (e.g. \'D:\\path\\fleet.log.gz\')'
+    )
+    parser_compact.add_argument('--compress', required=False, action='store', type=str,
+                                choices=tuple(COMPRESSIONS), default='gzip', dest='compress',
+                                help='optional output compression: gzip (default) or zstd'
+    )
+    parser_compact.add_argument('--workers', required=False, action='store', type=int, dest='workers',
+                                help='optional worker processes (default, one per CPU)'
+    )
+    parser_compact.add_argument('--fan-in', required=False, action='store', type=int, default=64,
+                                dest='fan_in',
+                                help='optional most sorted runs merged at once (default 64)'
+    )
+    parser_compact.add_argument('--dedup-size', required=False, action='store', type=int, default=4096,
+                                dest='dedup_size',
+                                help='optional distinct alert blocks remembered for deduplication'
+                                     ' (default 4096, 0 keeps every repeat)'
+    )
+    args = parser.parse_args()
+    if args.command is None and args.mode == 'multiprocess' and args.logfile_path_name is None:
+        parser.error('--mode multiprocess requires --lfpn (the collector writes to a log file)')
+    return args
+
+
+# Supported setup() handler modes and queue overflow policies.
+MODES = ('sync', 'async', 'asyncio', 'multiprocess')
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_fyi')
+
+# Environment variable holding the default setup() logger level (e.g. CONFIG_LOG_LEVEL=WARNING).
+LEVEL_ENV_VAR = 'CONFIG_LOG_LEVEL'
+
+# Logging record date format for handlers.
+# See https://docs.python.org/3/library/time.html#time.strftime
+DATEFMT = '%Y-%m-%d %H:%M:%S %z'
 
+# Default logging record formats for the fyi (debug, info) and alert (warning, error, critical) handlers.
+# %(context)s shows the fields bound with bind()/bound() (nothing when none are bound).
+# See https://docs.python.org/3/library/logging.html#logrecord-attributes
+FMT_FYI = (
+    '\n'
+    '%(asctime)s - %(name)s - %(levelname)s: %(context)s%(message)s'
+)
+FMT_ALERT = (
+    '\n'
+    '-----\n'
+    '%(context)s%(message)s \n'
+    '%(asctime)s - %(name)s - %(levelname)s \n'
+    '%(threadName)s → %(processName)s \n'
+    '%(pathname)s \n'
+    '→ %(module)s → %(funcName)s @ %(lineno)d'
+)
 
-def setup(logger_name: str, logfile_path_name: str | None = None) -> logging.Logger:
+# Default alert format in 'asyncio' mode: FMT_ALERT with the current asyncio task's name after the thread's.
+FMT_ALERT_ASYNCIO = FMT_ALERT.replace('%(threadName)s → ', '%(threadName)s [%(taskName)s] → ')
+
+# Supported setup() output formats: human-readable text (FMT_FYI/FMT_ALERT layout), JSON lines, or
+# length-prefixed binary records.
+OUTPUT_FORMATS = ('text', 'json', 'binary')
+
+# LogRecord attributes that need a caller stack walk, or the thread/process switches, to be filled in.
+# See https://docs.python.org/3/library/logging.html#logrecord-attributes
+_CALLER_FIELDS = frozenset(('pathname', 'filename', 'module', 'funcName', 'lineno'))
+_THREAD_FIELDS = frozenset(('thread', 'threadName'))
+_FIELD_PATTERN = re.compile(r'%\((\w+)\)')
+
+
+def _format_fields(fmt: str) -> frozenset:
     """
-    Setup configuration of logging to file or stderr (e.g. info, debug, warning, error, critical).
+    Return the LogRecord attribute names referenced by a %-style logging format.
+    """
+    return frozenset(_FIELD_PATTERN.findall(fmt))
 
-    PURPOSE: Store or display helpful logging record messages for testing and debugging.
 
-    USAGE: 
-        from config_log import setup
-        [ … other imports and definitions … ]
-        if __name__ == '__main__':
-            logger = config_log.setup(logger_name, logfile_path_name) [--OR-- logger = config_log.setup(logger_name) # to stderr ]
+# Exception group types (Python 3.11+; none before).
+_EXCEPTION_GROUPS = getattr(builtins, 'BaseExceptionGroup', ())
+
+
+class _TracebackRenderer:
+    """
+    Traceback renderer for formatException that caches rendered stacks by code location.
+
+    PURPOSE: Make recurring exceptions cheap to log: the stack of each exception in a chain is rendered
+             (with source lines from linecache) once per distinct chain of code locations; later records
+             only walk the traceback to build the key and render the exception messages, which may differ.
+
+    Output matches logging.Formatter.formatException (traceback.print_exception), except:
+      - with max_frames, only the innermost max_frames frames of each exception are shown
+      - with max_chars, only the last max_chars characters are kept
+      - with source_lines false, linecache is never read (no source lines or position markers)
+    Exception groups (Python 3.11+), whose sub-exception tracebacks this renderer does not walk, are
+    rendered by traceback.format_exception, uncached (max_frames and max_chars still apply).
+
+    USAGE:
+      - renderer = _TracebackRenderer.get(max_frames, max_chars, source_lines)  # shared per options
+      - text = renderer(exc_info)
 
     INPUT:
-      - logger_name (str) = name of logger instance (e.g. __name__)
-      - logfile_path_name (str)(optional) = path and name of log file, if omitted stream to stderr
-                                            (e.g. D:\\application\\logs\\execution.log)
+      - max_frames (int)(optional) = innermost frames kept per exception (default 0, all)
+      - max_chars (int)(optional) = characters kept, from the end (default 0, all)
+      - source_lines (bool)(optional) = show source lines (default true)
+      - cache_size (int)(optional) = distinct chains of code locations cached (default 256)
 
-    OUTPUT:
-      - logger (logging.Logger) = logger instance
+    REFERENCES:
+      - traceback -- See https://docs.python.org/3/library/traceback.html
+    """
+    _CAUSE = '\nThe above exception was the direct cause of the following exception:\n\n'
+    _CONTEXT = '\nDuring handling of the above exception, another exception occurred:\n\n'
+    _instances: dict[tuple, '_TracebackRenderer'] = {}
+
+    def __init__(self, max_frames: int = 0, max_chars: int = 0, source_lines: bool = True,
+                 cache_size: int = 256):
+        self.max_frames = max_frames
+        self.max_chars = max_chars
+        self.source_lines = source_lines
+        self.cache_size = cache_size
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, max_frames: int = 0, max_chars: int = 0, source_lines: bool = True) -> '_TracebackRenderer':
+        """
+        Return the renderer (and its cache) shared by every formatter with these options.
+        """
+        key = (max_frames, max_chars, source_lines)
+        renderer = cls._instances.get(key)
+        if renderer is None:
+            renderer = cls._instances.setdefault(key, cls(*key))
+        return renderer
+
+    def __call__(self, exc_info: tuple) -> str:
+        """
+        Return the rendered traceback of exc_info, without a trailing newline.
+        """
+        # Chain of exceptions, newest first, with the message linking each to the next (older) one.
+        chain, links, seen = [], [], set()
+        exc = exc_info[1]
+        if exc is None:
+            return ''.join(traceback.format_exception_only(exc_info[0], None)).rstrip('\n')
+        while exc is not None and id(exc) not in seen:
+            seen.add(id(exc))
+            chain.append(exc)
+            if exc.__cause__ is not None:
+                links.append(self._CAUSE)
+                exc = exc.__cause__
+            elif exc.__context__ is not None and not exc.__suppress_context__:
+                links.append(self._CONTEXT)
+                exc = exc.__context__
+            else:
+                exc = None
+        if any(isinstance(exc, _EXCEPTION_GROUPS) for exc in chain):
+            limit = -self.max_frames if self.max_frames else None
+            return self._truncate(''.join(traceback.format_exception(*exc_info, limit=limit)).rstrip('\n'))
+        tracebacks = [exc_info[2]] + [exc.__traceback__ for exc in chain[1:]]
+
+        # Rendered stacks, cached by the chain's code locations.
+        key = tuple((type(exc), tuple((tb.tb_frame.f_code, tb.tb_lasti) for tb in self._walk(tb)))
+                    for exc, tb in zip(chain, tracebacks))
+        stacks = self._cache.get(key)
+        if stacks is None:
+            stacks = [self._render_stack(tb) for tb in tracebacks]
+            with self._lock:
+                if len(self._cache) >= self.cache_size:
+                    del self._cache[next(iter(self._cache))]
+                self._cache[key] = stacks
+
+        parts = []
+        for i in range(len(chain) - 1, -1, -1):
+            if stacks[i]:
+                parts.append('Traceback (most recent call last):\n')
+                parts.append(stacks[i])
+            parts.extend(traceback.format_exception_only(type(chain[i]), chain[i]))
+            if i:
+                parts.append(links[i - 1])
+        return self._truncate(''.join(parts).rstrip('\n'))
+
+    def _truncate(self, text: str) -> str:
+        """
+        Return text with only its last max_chars characters, if longer.
+        """
+        if self.max_chars and len(text) > self.max_chars:
+            text = f'[… {len(text) - self.max_chars} characters truncated …]\n' + text[-self.max_chars:]
+        return text
+
+    @staticmethod
+    def _walk(tb) -> Iterator:
+        while tb is not None:
+            yield tb
+            tb = tb.tb_next
+
+    def _render_stack(self, tb) -> str:
+        """
+        Return the stack lines of one traceback (empty without a traceback).
+        """
+        if tb is None:
+            return ''
+        frames = list(self._walk(tb))
+        omitted = 0
+        if self.max_frames and len(frames) > self.max_frames:
+            omitted = len(frames) - self.max_frames
+        head = f'  [… {omitted} outer frames omitted …]\n' if omitted else ''
+        if not self.source_lines:
+            return head + ''.join(
+                f'  File "{tb.tb_frame.f_code.co_filename}", line {tb.tb_lineno}, in {tb.tb_frame.f_code.co_name}\n'
+                for tb in frames[omitted:]
+            )
+        limit = -self.max_frames if self.max_frames else None
+        # TracebackException records column positions, for the same ^^^ markers as print_exception().
+        stack = traceback.TracebackException(BaseException, BaseException(), tb, limit=limit).stack
+        return head + ''.join(stack.format())
+
+
+class _CompiledFormatter(logging.Formatter):
+    """
+    Formatter that analyses its format once and caches the formatted timestamp for each second.
+
+    Behaves like logging.Formatter, except that it checks whether the format uses %(asctime)s once (not per
+    record) and, with a datefmt (which has one-second resolution), reuses the last formatted timestamp
+    while records fall within the same second. With a renderer, tracebacks are rendered (and cached) by
+    that _TracebackRenderer.
+
+    INPUT:
+      - fmt (str) = %-style logging record format
+      - datefmt (str)(optional) = time.strftime format for %(asctime)s
+      - renderer (_TracebackRenderer)(optional) = traceback renderer (default, logging.Formatter's)
+
+    INSTANCE VARIABLES:
+      - fields (frozenset) = LogRecord attribute names the format references
 
     REFERENCES:
-      - logging -- See https://docs.python.org/3/library/logging.html
+      - logging.Formatter -- See https://docs.python.org/3/library/logging.html#formatter-objects
     """
-    # Define filter functions
-    def filter_fyi(record: logging.LogRecord) -> bool:
+    def __init__(self, fmt: str, datefmt: str | None = None, renderer: _TracebackRenderer | None = None):
+        super().__init__(fmt, datefmt)
+        self.fields = _format_fields(fmt)
+        self.renderer = renderer
+        self._uses_time = self._style.usesTime()
+        self._uses_context = 'context' in self.fields
+        self._uses_task_name = 'taskName' in self.fields
+        self._last_time = (None, '')
+
+    def formatException(self, ei: tuple) -> str:
         """
-        Filter to accept logging records with level less than or equal to info level, otherwise ignore.
+        Override: render the traceback with the formatter's renderer, if any.
+        """
+        if self.renderer is None:
+            return super().formatException(ei)
+        return self.renderer(ei)
 
-        USAGE: 
-        - handler.addFilter(filter_fyi)
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        """
+        Extend: reuse the formatted timestamp of the previous record when in the same second.
+        """
+        if datefmt is None:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        last_second, last_text = self._last_time
+        if second != last_second:
+            last_text = time.strftime(datefmt, self.converter(second))
+            self._last_time = (second, last_text)
+        return last_text
 
-        INPUT:
-        - record (logging.LogRecord) = logging record instance -- see https://docs.python.org/3/library/logging.html#logging.LogRecord
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Override: same output as logging.Formatter.format, using the precomputed format analysis.
+        """
+        record.message = record.getMessage()
+        if self._uses_time:
+            record.asctime = self.formatTime(record, self.datefmt)
+        if self._uses_context and 'context' not in record.__dict__:  # made without the context record factory
+            record.context = _EMPTY_CONTEXT
+        if self._uses_task_name and not hasattr(record, 'taskName'):  # before Python 3.12, set by asyncio mode only
+            record.taskName = None
+        s = self.formatMessage(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            if s[-1:] != '\n':
+                s = s + '\n'
+            s = s + record.exc_text
+        if record.stack_info:
+            if s[-1:] != '\n':
+                s = s + '\n'
+            s = s + self.formatStack(record.stack_info)
+        return s
 
-        OUTPUT:
-        - (bool) = true to accept, false to ignore
 
-        REFERENCES:
-        - logging -- See https://docs.python.org/3/library/logging.html
+def _json_value(value, encode_string) -> str:
+    """
+    Return value encoded as a JSON value (strings escaped with encode_string, so a record always stays on
+    one line).
+    """
+    if type(value) is str:
+        return encode_string(value)
+    if type(value) is _Context:
+        return value.json()
+    if type(value) is int:
+        return str(value)
+    if value is None:
+        return 'null'
+    if type(value) is float and value == value and value not in (float('inf'), float('-inf')):
+        return repr(value)
+    return encode_string(str(value))
+
+
+class _JsonFormatter(_CompiledFormatter):
+    """
+    Formatter writing each record as one line of JSON with the fields its %-style format references.
+
+    E.g. FMT_FYI gives {"asctime": …, "name": …, "levelname": …, "message": …}. A rendered traceback or
+    stack is added as "exc_text" or "stack_info". Keys are encoded once, when the formatter is created,
+    and values are read straight from the record (no per-record dict).
+
+    INPUT:
+      - fmt (str) = %-style logging record format whose fields (in order) become the JSON keys
+      - datefmt (str)(optional) = time.strftime format for asctime
+    """
+    def __init__(self, fmt: str, datefmt: str | None = None, renderer: _TracebackRenderer | None = None):
+        from json.encoder import encode_basestring
+
+        super().__init__(fmt, datefmt, renderer)
+        self._encode_string = encode_basestring
+        names = list(dict.fromkeys(_FIELD_PATTERN.findall(fmt)))
+        self._keys = [('{' if i == 0 else ',') + encode_basestring(name) + ':'
+                      for i, name in enumerate(names)]
+        self._names = names
+        self._exc_key = (',' if names else '{') + '"exc_text":'
+        self._stack_key = (',' if names else '{') + '"stack_info":'
+
+    def format(self, record: logging.LogRecord) -> str:
         """
-        return record.levelno <= 20 # logging.INFO value
-    
-    
-    # Create logging instance and set logging level.
-    # See https://docs.python.org/3/howto/logging.html#logging-flow
-    #     https://docs.python.org/3/howto/logging.html#loggers
-    logger = logging.getLogger(logger_name)
-    logger.setLevel(logging.DEBUG)
+        Override: return record as one line of JSON.
+        """
+        record.message = record.getMessage()
+        if self._uses_time:
+            record.asctime = self.formatTime(record, self.datefmt)
+        if self._uses_context and 'context' not in record.__dict__:  # made without the context record factory
+            record.context = _EMPTY_CONTEXT
+        encode_string = self._encode_string
+        parts = []
+        for key, name in zip(self._keys, self._names):
+            parts.append(key)
+            parts.append(_json_value(getattr(record, name, None), encode_string))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            parts.append(self._exc_key if parts else '{"exc_text":')
+            parts.append(encode_string(record.exc_text))
+        if record.stack_info:
+            parts.append(self._stack_key if parts else '{"stack_info":')
+            parts.append(encode_string(self.formatStack(record.stack_info)))
+        parts.append('}' if parts else '{}')
+        return ''.join(parts)
 
-    # Create logging handlers for storage or display (stderr), as desired
-    # See https://docs.python.org/3/library/logging.handlers.html
-    if logfile_path_name == None: # logging record messages to stderr
-        handler_fyi = logging.StreamHandler()
-        handler_alert = logging.StreamHandler()
-    else:  # logging record messages to logfile_path_name
-        handler_fyi = logging.FileHandler(logfile_path_name, mode='a', encoding='utf-8')
-        handler_alert = logging.FileHandler(logfile_path_name, mode='a', encoding='utf-8')
-    
-    # Set logging handlers' level.
-    handler_fyi.setLevel(logging.DEBUG)
-    handler_alert.setLevel(logging.WARNING)
-    
-    # Add handler filter.
-    # See https://docs.python.org/3/library/logging.html#filter-objects
-    handler_fyi.addFilter(filter_fyi)
 
-    # Create logging record date format for handlers.
-    # See https://docs.python.org/3/library/time.html#time.strftime
-    datefmt = '%Y-%m-%d %H:%M:%S %z'
-    
-    # Create logging record formats for handlers.
-    # See https://docs.python.org/3/library/logging.html#logrecord-attributes
-    fmt_fyi = (
-        '\n'
-        '%(asctime)s - %(name)s - %(levelname)s: %(message)s'
-    )
-    fmt_alert = (
-        '\n'
-        '-----\n'
-        '%(message)s \n'
-        '%(asctime)s - %(name)s - %(levelname)s \n'
-        '%(threadName)s → %(processName)s \n'
-        '%(pathname)s \n'
-        '→ %(module)s → %(funcName)s @ %(lineno)d'
-    )
+# Binary record layout: marker byte and body length ('>BI'), then for each field its id (index in
+# BINARY_FIELDS), UTF-8 length and bytes ('>BI' + data). Append new field names only, to keep ids stable.
+BINARY_MARKER = 0xB1
+BINARY_FIELDS = (
+    'asctime', 'created', 'msecs', 'relativeCreated', 'name', 'levelname', 'levelno', 'message',
+    'pathname', 'filename', 'module', 'funcName', 'lineno', 'thread', 'threadName', 'process',
+    'processName', 'taskName', 'exc_text', 'stack_info', 'context',
+)
+_BINARY_INT_FIELDS = frozenset(('levelno', 'lineno', 'thread', 'process'))
+_BINARY_FLOAT_FIELDS = frozenset(('created', 'msecs', 'relativeCreated'))
+_BINARY_JSON_FIELDS = frozenset(('context',))
+_binary_header = struct.Struct('>BI')
+_length = struct.Struct('>I')
 
-    # Create logging formatters for handlers.
-    # See https://docs.python.org/3/howto/logging.html#formatters
-    formatter_fyi = logging.Formatter(fmt_fyi, datefmt)
-    formatter_alert = logging.Formatter(fmt_alert, datefmt)
 
-    # Set logging formatters for handlers.
-    handler_fyi.setFormatter(formatter_fyi)
-    handler_alert.setFormatter(formatter_alert)
+class _BinaryFormatter(_CompiledFormatter):
+    """
+    Formatter writing each record as a compact length-prefixed binary record (see BINARY_FIELDS) with the
+    fields its %-style format references, plus exc_text/stack_info when present.
 
-    # Add logging handlers to instance logger.
-    logger.addHandler(handler_fyi)
-    logger.addHandler(handler_alert)
+    format() still returns text (e.g. for handleError messages); handlers writing files call format_bytes().
 
-    # Return logger instance.
-    return logger
+    INPUT:
+      - fmt (str) = %-style logging record format whose fields become the binary record's fields
+      - datefmt (str)(optional) = time.strftime format for asctime
+    """
+    def __init__(self, fmt: str, datefmt: str | None = None, renderer: _TracebackRenderer | None = None):
+        super().__init__(fmt, datefmt, renderer)
+        names = list(dict.fromkeys(_FIELD_PATTERN.findall(fmt)))
+        unknown = [name for name in names if name not in BINARY_FIELDS]
+        if unknown:
+            raise ValueError(f"output_format 'binary' does not support fields {unknown}")
+        self._fields = [(bytes((BINARY_FIELDS.index(name),)), name) for name in names]
+        self._exc_id = bytes((BINARY_FIELDS.index('exc_text'),))
+        self._stack_id = bytes((BINARY_FIELDS.index('stack_info'),))
 
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        """
+        Return record as one binary record.
+        """
+        record.message = record.getMessage()
+        if self._uses_time:
+            record.asctime = self.formatTime(record, self.datefmt)
+        if self._uses_context and 'context' not in record.__dict__:  # made without the context record factory
+            record.context = _EMPTY_CONTEXT
+        pack_length = _length.pack
+        parts = []
+        for field_id, name in self._fields:
+            value = getattr(record, name, None)
+            if type(value) is _Context:
+                value = value.json()
+            data = (value if type(value) is str else str(value)).encode('utf-8')
+            parts += (field_id, pack_length(len(data)), data)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data = record.exc_text.encode('utf-8')
+            parts += (self._exc_id, pack_length(len(data)), data)
+        if record.stack_info:
+            data = self.formatStack(record.stack_info).encode('utf-8')
+            parts += (self._stack_id, pack_length(len(data)), data)
+        body = b''.join(parts)
+        return _binary_header.pack(BINARY_MARKER, len(body)) + body
+
+
+class _BoundedQueueHandler(logging.Handler):
+    """
+    Queue handler that enqueues logging records without blocking on I/O, applying an overflow policy when full.
+
+    PURPOSE: Keep blocking writes off the caller's thread; the real fyi/alert handlers run on a listener thread.
+
+    Works like logging.handlers.QueueHandler (which is not subclassed, since importing logging.handlers
+    loads socket, pickle and queue for every importer of setup()).
+
+    INPUT:
+      - log_queue (queue.Queue) = bounded queue shared with the listener
+      - overflow (str) = policy when the queue is full:
+          'block'       -- wait for room (no records lost)
+          'drop_oldest' -- discard the oldest queued record to make room
+          'drop_fyi'    -- discard new debug/info records; warning and above still wait for room
+      - renderer (_TracebackRenderer)(optional) = traceback renderer (default, logging.Formatter's)
+
+    INSTANCE VARIABLES:
+      - dropped (int) = count of records discarded by the overflow policy
+      - dropped_levels (dict) = count of records discarded, by level name
+
+    REFERENCES:
+      - logging.handlers.QueueHandler -- See https://docs.python.org/3/library/logging.handlers.html#queuehandler
+    """
+    def __init__(self, log_queue: 'queue.Queue', overflow: str = 'block',
+                 renderer: _TracebackRenderer | None = None):
+        import queue
+
+        super().__init__()
+        self.queue = log_queue
+        self.overflow = overflow
+        self.dropped = 0
+        self.dropped_levels = {}
+        self._exc_formatter = _CompiledFormatter('%(message)s', renderer=renderer)
+        self._full = queue.Full
+        self._empty = queue.Empty
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Override: enqueue a prepared copy of record.
+        """
+        try:
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Resolve message arguments and traceback text on the caller's thread, but leave the fyi/alert layout
+        (e.g. asctime, traceback placement) to the listener's formatters. Returns a copy of record.
+        """
+        prepared = object.__new__(type(record))
+        prepared.__dict__.update(record.__dict__)
+        record = prepared
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Put record on the queue, applying the overflow policy when the queue is full.
+        """
+        if self.overflow == 'block':
+            self.queue.put(record)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except self._full:
+                if self.overflow == 'drop_fyi':
+                    if record.levelno <= logging.INFO:
+                        self._count_drop(record)
+                        return
+                    self.queue.put(record)
+                    return
+                try:  # 'drop_oldest'
+                    oldest = self.queue.get_nowait()
+                    self.queue.task_done()
+                    self._count_drop(oldest)
+                except self._empty:
+                    pass
+
+    def _count_drop(self, record: logging.LogRecord) -> None:
+        self.dropped += 1
+        self.dropped_levels[record.levelname] = self.dropped_levels.get(record.levelname, 0) + 1
+
+
+class _AsyncioQueueHandler(_BoundedQueueHandler):
+    """
+    Queue handler for asyncio programs: logging from an event loop thread never waits.
+
+    Extends _BoundedQueueHandler: on a thread running an event loop, a full queue never blocks; the 'block'
+    policy then drops the oldest queued record instead (counted in dropped). Other threads follow the
+    overflow policy as usual. The handler takes no lock (the queue is thread-safe), so a thread waiting
+    for room never holds up the event loop. Records are tagged with the current asyncio task's name
+    (record.taskName, None outside a task), as logging does from Python 3.12; tagging in the handler (not
+    a logger filter) covers records propagated from child loggers too.
+
+    REFERENCES:
+      - asyncio -- See https://docs.python.org/3/library/asyncio-dev.html#logging
+    """
+    def __init__(self, log_queue: 'queue.Queue', overflow: str = 'block',
+                 renderer: _TracebackRenderer | None = None):
+        import asyncio
+
+        super().__init__(log_queue, overflow, renderer)
+        self._get_running_loop = asyncio.get_running_loop
+        self._current_task = asyncio.current_task
+
+    def handle(self, record: logging.LogRecord):
+        """
+        Override: filter and emit record without taking the handler lock.
+        """
+        result = self.filter(record)
+        if isinstance(result, logging.LogRecord):
+            record = result
+        if result:
+            self.emit(record)
+        return result
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Extend: tag the record with the current asyncio task's name.
+        """
+        record = super().prepare(record)
+        if getattr(record, 'taskName', None) is None:
+            try:
+                task = self._current_task()
+            except RuntimeError:  # no running event loop
+                task = None
+            record.taskName = None if task is None else task.get_name()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Extend: on an event loop thread, make room rather than wait when the queue is full.
+        """
+        try:
+            self._get_running_loop()
+        except RuntimeError:  # not an event loop thread: the usual overflow policy
+            super().enqueue(record)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except self._full:
+                if self.overflow == 'drop_fyi' and record.levelno <= logging.INFO:
+                    self._count_drop(record)
+                    return
+                try:
+                    oldest = self.queue.get_nowait()
+                    self.queue.task_done()
+                    self._count_drop(oldest)
+                except self._empty:
+                    pass
+
+
+class _QueueListener:
+    """
+    Thread running the fyi/alert handlers on the records of a queue, until stop().
+
+    Works like logging.handlers.QueueListener with respect_handler_level=True, except that stop() waits for
+    room in a full queue (rather than raising queue.Full), so it always flushes the queued records.
+
+    INPUT:
+      - log_queue (queue.Queue) = queue filled by a _BoundedQueueHandler
+      - handlers (logging.Handler) = handlers each record is passed to, when at or above their level
+
+    REFERENCES:
+      - logging.handlers.QueueListener -- See https://docs.python.org/3/library/logging.handlers.html#queuelistener
+    """
+    _sentinel = None
+
+    def __init__(self, log_queue: 'queue.Queue', *handlers: logging.Handler):
+        self.queue = log_queue
+        self.handlers = handlers
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start the listener thread.
+        """
+        self._thread = threading.Thread(target=self._monitor, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Handle the records queued so far, then stop the listener thread.
+        """
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+
+    def handle(self, record: logging.LogRecord) -> None:
+        """
+        Pass record to each handler whose level it reaches.
+        """
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _monitor(self) -> None:
+        while True:
+            record = self.queue.get()
+            try:
+                if record is self._sentinel:
+                    return
+                self.handle(record)
+            finally:
+                self.queue.task_done()
+
+
+# Supported compressions of rotated log segments, with their file name suffixes.
+COMPRESSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+def _open_compressed(path: str, compress: str):
+    """
+    Open path for writing binary data compressed with compress ('gzip' or 'zstd').
+
+    'zstd' uses the standard library (Python 3.14+) or, if installed, the zstandard package.
+    """
+    if compress == 'gzip':
+        import gzip
+        return gzip.open(path, 'wb')
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.open(path, 'wb')
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError as error:
+        raise ModuleNotFoundError(
+            "compress='zstd' needs Python 3.14+ or the zstandard package (pip install zstandard)"
+        ) from error
+    return zstandard.open(path, 'wb')
+
+
+def _compress_segment(segment: str, compress: str) -> None:
+    """
+    Replace a rotated log segment with its compressed copy (segment + '.gz' or '.zst'); a segment already
+    gone (e.g. pruned) is skipped.
+    """
+    import shutil
+
+    target = segment + COMPRESSIONS[compress]
+    try:
+        source = open(segment, 'rb')
+    except FileNotFoundError:
+        return
+    with source, _open_compressed(target + '.tmp', compress) as sink:
+        shutil.copyfileobj(source, sink, 1024 * 1024)
+    os.replace(target + '.tmp', target)
+    os.unlink(segment)
+
+
+def _prune_segments(path: str, backup_count: int) -> None:
+    """
+    Delete the oldest rotated segments of log file path, keeping backup_count of them.
+    """
+    directory, base = os.path.split(path)
+    pattern = re.compile(re.escape(base) + r'\.(\d{8}-\d{6})(?:\.(\d+))?(?:\.gz|\.zst)?$')
+    segments = []
+    for name in os.listdir(directory or '.'):
+        match = pattern.match(name)
+        if match:
+            segments.append((match.group(1), int(match.group(2) or 0), name))
+    segments.sort()
+    for _, _, name in segments[:-backup_count]:
+        try:
+            os.unlink(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+
+class _SegmentWorker:
+    """
+    Background thread that compresses rotated log segments and prunes old ones, so the logging call
+    path only pays for the rename. Pruning waits until the queue is drained, so a burst of rotations never
+    deletes a segment still waiting to be compressed.
+
+    USAGE:
+      - _SegmentWorker.get().submit(segment, compress, path, backup_count)
+    """
+    _instance: '_SegmentWorker | None' = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        import queue
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='config_log-segments', daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def get(cls) -> '_SegmentWorker':
+        """
+        Return the process's segment worker, starting it (and its flush at exit) on first use.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.join)
+            return cls._instance
+
+    def submit(self, segment: str, compress: str | None, path: str, backup_count: int) -> None:
+        """
+        Queue a rotated segment for compression (if compress) and pruning (if backup_count).
+        """
+        self.queue.put((segment, compress, path, backup_count))
+
+    def join(self) -> None:
+        """
+        Wait until queued segments are compressed and pruned.
+        """
+        self.queue.join()
+
+    def _run(self) -> None:
+        prunes = {}  # log file path -> backup_count, pruned once no segment is queued
+        while True:
+            segment, compress, path, backup_count = self.queue.get()
+            try:
+                if compress:
+                    _compress_segment(segment, compress)
+                if backup_count:
+                    prunes[path] = backup_count
+                if self.queue.empty():
+                    while prunes:
+                        _prune_segments(*prunes.popitem())
+            except Exception:
+                if logging.raiseExceptions:
+                    traceback.print_exc()
+            finally:
+                self.queue.task_done()
+
+
+# A forked child starts its own segment worker (threads do not survive fork).
+os.register_at_fork(after_in_child=lambda: setattr(_SegmentWorker, '_instance', None))
+
+
+class _SharedFile:
+    """
+    One open log file, write buffer, and lock shared by every handler writing to the same path.
+
+    PURPOSE: Let the fyi/alert handler pair use a single file descriptor and lock, so their
+             records are written whole and in order (no torn or interleaved buffer flushes).
+
+    USAGE:
+      - shared = _SharedFile.open(logfile_path_name)  # reference counted per absolute path
+      - shared.write(data, levelno)                   # caller holds shared.lock
+      - shared.release()                              # closes the file with its last user
+
+    ROTATION: With max_bytes and/or rotate_interval, a write that would exceed max_bytes, or comes after
+    the interval, first renames the file to path.YYYYmmdd-HHMMSS and reopens path. Compression and
+    pruning to backup_count segments run on the background _SegmentWorker. Because both handlers of
+    the fyi/alert pair share this object and its lock, rotation never splits or loses their records.
+
+    BATCHING: With batch_records, batch_bytes and/or batch_ms, records are held in memory and written
+    together (one os.writev() where available) once batch_records records or batch_bytes bytes are
+    pending, or the oldest pending record is batch_ms old. Error and critical records write the batch at
+    once, as do flush(), release(), fork, interpreter exit (via teardown()) and SIGTERM.
+
+    INSTANCE VARIABLES:
+      - path (str) = absolute path of the log file
+      - encoding (str) = text encoding of records written to the file
+      - lock (threading.RLock) = lock shared by all handlers of this file
+      - autoflush (bool) = flush after each record (default); when false, the owner calls flush() per batch
+      - bytes_written (int) = bytes of records written (or batched) through this object
+      - options (tuple) = (max_bytes, rotate_interval, backup_count, compress, batch_records, batch_bytes,
+                           batch_ms) rotation and batching options
+    """
+    _registry: dict[str, '_SharedFile'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str, encoding: str = 'utf-8', max_bytes: int = 0, rotate_interval: float = 0,
+                 backup_count: int = 0, compress: str | None = None, batch_records: int = 0,
+                 batch_bytes: int = 0, batch_ms: float = 0):
+        self.path = path
+        self.encoding = encoding
+        self.lock = threading.RLock()
+        self.autoflush = True
+        self.bytes_written = 0
+        self.options = self._options(max_bytes, rotate_interval, backup_count, compress,
+                                     batch_records, batch_bytes, batch_ms)
+        self._max_bytes = max_bytes
+        self._rotate_interval = rotate_interval
+        self._backup_count = backup_count
+        self._compress = compress
+        self._segment = ('', 0)
+        self._batching = bool(batch_records or batch_bytes or batch_ms)
+        self._batch_records = batch_records
+        self._batch_bytes = batch_bytes
+        self._batch_ms = batch_ms
+        self._pending = []
+        self._pending_bytes = 0
+        self._pending_since = 0.0
+        self._closed = threading.Event()
+        self._refs = 0
+        self._open_stream()
+        if rotate_interval and self._size:
+            self._rotate_at = os.path.getmtime(path) + rotate_interval
+        if batch_ms:
+            self._start_flusher()
+
+    @classmethod
+    def open(cls, logfile_path_name: str, encoding: str = 'utf-8', replace: bool = False,
+             **options) -> '_SharedFile':
+        """
+        Return the shared file for logfile_path_name, opening it on first use.
+
+        INPUT:
+          - logfile_path_name (str) = path and name of log file
+          - encoding (str)(optional) = text encoding of records (default 'utf-8')
+          - replace (bool)(optional) = when the file is already open with other rotation or batching options,
+                                       open it again with these options for new users (default False); the
+                                       old object stays open until its last user releases it
+          - options (optional) = rotation and batching options: max_bytes, rotate_interval, backup_count,
+                                 compress, batch_records, batch_bytes, batch_ms (see setup())
+
+        Raises ValueError if the file is already open with different rotation or batching options (and not
+        replace).
+        """
+        path = os.path.abspath(logfile_path_name)
+        with cls._registry_lock:
+            shared = cls._registry.get(path)
+            if shared is None:
+                shared = cls._registry[path] = cls(path, encoding, **options)
+            elif shared.options != cls._options(**options):
+                if not replace:
+                    raise ValueError(f'log file {path!r} is already open with other rotation/batching options')
+                shared.flush()  # records written so far precede the new object's
+                shared = cls._registry[path] = cls(path, encoding, **options)
+            shared._refs += 1
+            return shared
+
+    @staticmethod
+    def _options(max_bytes: int = 0, rotate_interval: float = 0, backup_count: int = 0,
+                 compress: str | None = None, batch_records: int = 0, batch_bytes: int = 0,
+                 batch_ms: float = 0) -> tuple:
+        return (max_bytes, rotate_interval, backup_count, compress, batch_records, batch_bytes, batch_ms)
+
+    def _start_flusher(self) -> None:
+        """
+        Start the thread writing a batch once its oldest record is batch_ms old.
+        """
+        thread = threading.Thread(target=self._run_flusher, name='config_log-flusher', daemon=True)
+        thread.start()
+
+    def _run_flusher(self) -> None:
+        interval = self._batch_ms / 1000
+        while not self._closed.wait(interval / 2):
+            with self.lock:
+                if self._pending and time.monotonic() - self._pending_since >= interval:
+                    self._write_pending()
+
+    def _write_pending(self) -> None:
+        """
+        Write pending batched records in one system call where possible (caller holds self.lock).
+        """
+        pending, self._pending, self._pending_bytes = self._pending, [], 0
+        if not pending or self.stream.closed:
+            return
+        self.stream.flush()
+        if _writev is None or len(pending) == 1:
+            self.stream.write(b''.join(pending))
+            self.stream.flush()
+            return
+        fd = self.stream.fileno()
+        for start in range(0, len(pending), _IOV_MAX):
+            chunk = pending[start:start + _IOV_MAX]
+            written = _writev(fd, chunk)
+            rest = b''.join(chunk)[written:] if written < sum(map(len, chunk)) else b''
+            while rest:  # finish a short write
+                rest = rest[os.write(fd, rest):]
+
+    def _open_stream(self) -> None:
+        self.stream = open(self.path, 'ab')
+        self._size = self.stream.tell()
+        self._rotate_at = time.time() + self._rotate_interval
+
+    def _should_rotate(self, size: int) -> bool:
+        if self._max_bytes and self._size and self._size + size > self._max_bytes:
+            return True
+        if self._rotate_interval and time.time() >= self._rotate_at:
+            if self._size:
+                return True
+            self._rotate_at = time.time() + self._rotate_interval  # nothing to rotate yet
+        return False
+
+    def _rotate(self) -> None:
+        """
+        Rename the current file to a timestamped segment, reopen path, and hand the segment to the
+        background worker (caller holds self.lock).
+        """
+        self._write_pending()
+        self.stream.close()
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        n = self._segment[1] + 1 if stamp == self._segment[0] else 0  # keep same-second segments in order
+        while True:
+            candidate = f'{self.path}.{stamp}' + (f'.{n}' if n else '')
+            if not any(os.path.exists(candidate + suffix) for suffix in ('', *COMPRESSIONS.values())):
+                break
+            n += 1
+        self._segment = (stamp, n)
+        os.rename(self.path, candidate)
+        self._open_stream()
+        if self._compress or self._backup_count:
+            _SegmentWorker.get().submit(candidate, self._compress, self.path, self._backup_count)
+
+    def release(self) -> None:
+        """
+        Drop one reference, closing the file when no handler uses it any more.
+        """
+        with self._registry_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            if self._registry.get(self.path) is self:
+                del self._registry[self.path]
+        with self.lock:
+            self._closed.set()
+            self._write_pending()
+            self.stream.close()
+
+    def write(self, data: bytes, levelno: int) -> None:
+        """
+        Write one encoded record, rotating first when due (caller holds self.lock).
+        """
+        if (self._max_bytes or self._rotate_interval) and self._should_rotate(len(data)):
+            self._rotate()
+        self._size += len(data)
+        self.bytes_written += len(data)
+        if self._batching:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+            if (levelno >= logging.ERROR
+                    or (self._batch_records and len(self._pending) >= self._batch_records)
+                    or (self._batch_bytes and self._pending_bytes >= self._batch_bytes)):
+                self._write_pending()
+            return
+        self.stream.write(data)
+        if self.autoflush:
+            self.stream.flush()
+
+    def flush(self) -> None:
+        """
+        Write pending batched records and flush buffered records to the operating system.
+        """
+        with self.lock:
+            if not self.stream.closed:
+                self._write_pending()
+                self.stream.flush()
+
+
+# Gathered writes where the platform has them (not on Windows).
+_writev = getattr(os, 'writev', None)
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 1024
+
+
+def _flush_shared_files() -> None:
+    """
+    Write pending batched records of every open shared log file.
+    """
+    with _SharedFile._registry_lock:
+        shared_files = list(_SharedFile._registry.values())
+    for shared in shared_files:
+        shared.flush()
+
+
+def _restart_flushers() -> None:
+    """
+    Restart batch flusher threads in a forked child (threads do not survive fork).
+    """
+    for shared in _SharedFile._registry.values():
+        if shared._batch_ms:
+            shared._start_flusher()
+
+
+# Write pending batches before fork, so a child never inherits (and repeats) them.
+os.register_at_fork(before=_flush_shared_files, after_in_child=_restart_flushers)
+
+
+def _install_signal_flush(signum: int | None = None) -> None:
+    """
+    Write pending batched records when signum (default SIGTERM) arrives, then pass the signal on to its
+    previous handler (by default, terminating the process as before).
+
+    Only the main thread can install signal handlers; elsewhere this does nothing.
+
+    REFERENCES:
+      - signal -- See https://docs.python.org/3/library/signal.html
+    """
+    import signal
+
+    if threading.current_thread() is not threading.main_thread():
+        return
+    if signum is None:
+        signum = signal.SIGTERM
+    previous = signal.getsignal(signum)
+    if getattr(previous, 'flushes_config_log', False):
+        return
+
+    def flush_then_forward(signum, frame):
+        _flush_shared_files()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+
+    flush_then_forward.flushes_config_log = True
+    signal.signal(signum, flush_then_forward)
+
+
+class _SharedFileHandler(logging.Handler):
+    """
+    Handler writing formatted records to a _SharedFile, using the shared file's lock as its own.
+
+    Behaves like logging.FileHandler (append mode), but several handlers (e.g. handler_fyi and
+    handler_alert) can share one file descriptor, buffer and lock.
+
+    INPUT:
+      - shared (_SharedFile) = shared log file, with a reference (from _SharedFile.open()) that close() releases
+
+    REFERENCES:
+      - logging.Handler -- See https://docs.python.org/3/library/logging.html#handler-objects
+    """
+    terminator = '\n'
+
+    def __init__(self, shared: _SharedFile):
+        super().__init__()
+        self.shared = shared
+        self.baseFilename = shared.path
+        self.lock = shared.lock
+        self._released = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Override: format record and write it to the shared file.
+        """
+        try:
+            format_bytes = getattr(self.formatter, 'format_bytes', None)
+            if format_bytes is not None:  # binary records
+                data = format_bytes(record)
+            else:
+                data = (self.format(record) + self.terminator).encode(self.shared.encoding)
+            self.shared.write(data, record.levelno)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """
+        Override: flush the shared file.
+        """
+        self.shared.flush()
+
+    def close(self) -> None:
+        """
+        Extend: release this handler's reference to the shared file.
+        """
+        with self.lock:
+            released, self._released = self._released, True
+        if not released:
+            self.shared.release()
+        super().close()
+
+
+# Flight recorder ring file layout: header (magic, capacity, head, tail, count, seq, dumped_seq) in the first
+# RING_DATA bytes, then the ring of entries, each a header (size, crc32 of data, created, seq) and the record's
+# bytes exactly as the fyi handler would write them to the log file. An entry never wraps: RING_WRAP in the
+# size field (or too little room for one) means the next entry starts at the beginning of the ring.
+RING_MAGIC = b'CLRING\x00\x01'
+_ring_header = struct.Struct('<8sQQQQQQ')
+_ring_entry = struct.Struct('<IIdQ')
+_ring_size = struct.Struct('<I')
+RING_DATA = 64
+RING_WRAP = 0xFFFFFFFF
+
+
+class _FlightRecorder:
+    """
+    Fixed-size, memory-mapped ring buffer file of recent debug/info records (the "flight recorder").
+
+    PURPOSE: Keep recent debug/info detail at the cost of a memory copy per record, and write it to the log
+             file only when a warning (or worse) shows it is needed.
+
+    Writes overwrite the oldest entries once the ring is full, so memory and disk use stay fixed. The ring
+    lives in a MAP_SHARED mapping of a file, so its contents survive a crash of the process (not of the
+    machine) and can be read back with read_flight_recorder(). A forked child continues on a private copy.
+
+    USAGE:
+      - recorder = _FlightRecorder.open(path, capacity)  # reference counted per absolute path
+      - recorder.write(data, created)                    # caller holds recorder.lock
+      - recorder.dump(shared, since)                     # write entries not yet dumped to a _SharedFile
+      - recorder.release()
+
+    INSTANCE VARIABLES:
+      - path (str) = absolute path of the ring file
+      - capacity (int) = bytes of ring entries
+      - lock (threading.RLock) = lock of the ring (the fyi handler's lock)
+    """
+    _registry: dict[str, '_FlightRecorder'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path: str, capacity: int):
+        import mmap
+
+        self.path = path
+        self.capacity = capacity
+        self.lock = threading.RLock()
+        self._refs = 0
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            size = RING_DATA + capacity
+            header = os.pread(fd, _ring_header.size, 0)
+            reuse = (len(header) == _ring_header.size and os.fstat(fd).st_size == size
+                     and _ring_header.unpack(header)[:2] == (RING_MAGIC, capacity))
+            if not reuse:  # new file, or another layout: start empty
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        if reuse:  # continue after the previous run's entries (still readable until overwritten)
+            (_, _, self._head, self._tail, self._count, self._seq,
+             self._dumped) = _ring_header.unpack_from(self._map, 0)
+            self._dumped = self._seq  # the previous run's entries are not this run's to dump
+        else:
+            self._head = self._tail = self._count = self._seq = self._dumped = 0
+        self._store_header()
+
+    @classmethod
+    def open(cls, path: str, capacity: int) -> '_FlightRecorder':
+        """
+        Return the flight recorder for path, opening (or creating) it on first use.
+
+        Raises ValueError if the ring file is already open with a different capacity.
+        """
+        path = os.path.abspath(path)
+        with cls._registry_lock:
+            recorder = cls._registry.get(path)
+            if recorder is None:
+                recorder = cls._registry[path] = cls(path, capacity)
+            elif recorder.capacity != capacity:
+                raise ValueError(f'flight recorder {path!r} is already open with another size')
+            recorder._refs += 1
+            return recorder
+
+    def _store_header(self) -> None:
+        _ring_header.pack_into(self._map, 0, RING_MAGIC, self.capacity, self._head, self._tail,
+                               self._count, self._seq, self._dumped)
+
+    def _drop(self, tail: int) -> int:
+        """
+        Forget the oldest entry (at tail, or after a wrap) and return the new tail.
+        """
+        size = _ring_size.unpack_from(self._map, RING_DATA + tail)[0] if tail + 4 <= self.capacity else RING_WRAP
+        if size == RING_WRAP:
+            return 0
+        self._count -= 1
+        return tail + size
+
+    def write(self, data: bytes, created: float) -> None:
+        """
+        Append one record's bytes, overwriting the oldest entries as needed (caller holds self.lock).
+        """
+        capacity = self.capacity
+        size = _ring_entry.size + len(data)
+        if size > capacity:  # keep what fits of an oversized record
+            data = data[:capacity - _ring_entry.size]
+            size = capacity
+        head, tail = self._head, self._tail
+        if head + size > capacity:  # no room before the end: forget entries after head, wrap around
+            while self._count and tail >= head:
+                tail = self._drop(tail)
+            if head + 4 <= capacity:
+                _ring_size.pack_into(self._map, RING_DATA + head, RING_WRAP)
+            head = 0
+        while self._count and head <= tail < head + size:
+            tail = self._drop(tail)
+        if not self._count:
+            tail = head
+        self._seq += 1
+        start = RING_DATA + head
+        _ring_entry.pack_into(self._map, start, size, zlib.crc32(data), created, self._seq)
+        self._map[start + _ring_entry.size:start + size] = data
+        self._head, self._tail = head + size, tail
+        self._count += 1
+        self._store_header()
+
+    def entries(self) -> Iterator[tuple]:
+        """
+        Yield (seq, created, data) of each entry, oldest first (caller holds self.lock).
+        """
+        yield from _ring_entries(self._map, self.capacity, self._tail, self._count)
+
+    def dump(self, shared: '_SharedFile', since: float) -> None:
+        """
+        Write the entries created at or after since, and not dumped before, to shared (whose lock the
+        caller holds), oldest first.
+        """
+        with self.lock:
+            if self._seq == self._dumped:
+                return
+            for seq, created, data in self.entries():
+                if seq > self._dumped and created >= since:
+                    shared.write(data, logging.INFO)
+            self._dumped = self._seq
+            self._store_header()
+
+    def after_fork_in_child(self) -> None:
+        """
+        Continue on a private copy of the ring, leaving the parent's file to the parent.
+        """
+        import mmap
+
+        private = mmap.mmap(-1, len(self._map))
+        private[:] = self._map[:]
+        self._map = private
+        self.lock = threading.RLock()
+
+    def release(self) -> None:
+        """
+        Drop one reference, unmapping the ring file when no handler uses it any more.
+        """
+        with self._registry_lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            if self._registry.get(self.path) is self:
+                del self._registry[self.path]
+        with self.lock:
+            self._map.flush()
+            self._map.close()
+
+
+def _ring_entries(buffer, capacity: int, tail: int, count: int) -> Iterator[tuple]:
+    """
+    Yield (seq, created, data) of count ring entries from tail, stopping at the first damaged entry.
+    """
+    position = tail
+    for _ in range(count):
+        if position + 4 > capacity or _ring_size.unpack_from(buffer, RING_DATA + position)[0] == RING_WRAP:
+            position = 0
+        if position + _ring_entry.size > capacity:
+            return
+        size, crc, created, seq = _ring_entry.unpack_from(buffer, RING_DATA + position)
+        if not _ring_entry.size <= size <= capacity - position:
+            return
+        data = bytes(buffer[RING_DATA + position + _ring_entry.size:RING_DATA + position + size])
+        if zlib.crc32(data) != crc:
+            return
+        yield seq, created, data
+        position += size
+
+
+def _fork_flight_recorders() -> None:
+    for recorder in _FlightRecorder._registry.values():
+        recorder.after_fork_in_child()
+
+
+os.register_at_fork(after_in_child=_fork_flight_recorders)
+
+
+def read_flight_recorder(ring_path_name: str, since: str | float | None = None) -> Iterator[bytes]:
+    """
+    Read back the records held in a flight recorder ring file, e.g. after a crash.
+
+    USAGE:
+      - for data in config_log.read_flight_recorder('app.log.ring'): sys.stdout.buffer.write(data)
+      - At command line: py config_log.py recover app.log.ring [--since TIME]
+
+    INPUT:
+      - ring_path_name (str) = ring file (the log file's path + '.ring')
+      - since (str | float)(optional) = earliest record time, as for query() (default None, all)
+
+    OUTPUT:
+      - yields each record's bytes, oldest first, exactly as the fyi handler would have written it (text
+        and JSON records end with a newline). Reading stops at the first damaged entry.
+    """
+    since = _parse_time(since)
+    with open(ring_path_name, 'rb') as ring_file:
+        buffer = ring_file.read()
+    if len(buffer) < _ring_header.size:
+        return
+    magic, capacity, _, tail, count, _, _ = _ring_header.unpack_from(buffer, 0)
+    if magic != RING_MAGIC or len(buffer) != RING_DATA + capacity:
+        raise ValueError(f'{ring_path_name!r} is not a flight recorder ring file')
+    for _, created, data in _ring_entries(buffer, capacity, tail, count):
+        if since is None or created >= since:
+            yield data
+
+
+class _FlightRecorderHandler(logging.Handler):
+    """
+    Handler writing formatted debug/info records into a _FlightRecorder instead of the log file.
+
+    INPUT:
+      - recorder (_FlightRecorder) = ring buffer, whose lock becomes this handler's lock
+    """
+    terminator = '\n'
+
+    def __init__(self, recorder: _FlightRecorder):
+        super().__init__()
+        self.recorder = recorder
+        self.lock = recorder.lock
+        self._released = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Override: format record and write it to the ring buffer.
+        """
+        try:
+            format_bytes = getattr(self.formatter, 'format_bytes', None)
+            if format_bytes is not None:  # binary records
+                data = format_bytes(record)
+            else:
+                data = (self.format(record) + self.terminator).encode('utf-8')
+            self.recorder.write(data, record.created)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        """
+        Extend: release this handler's reference to the ring buffer.
+        """
+        with self.lock:
+            released, self._released = self._released, True
+        if not released:
+            self.recorder.release()
+        super().close()
+
+
+class _FlightRecorderAlertHandler(_SharedFileHandler):
+    """
+    Alert handler first writing the flight recorder's recent records to the log file.
+
+    Extends _SharedFileHandler: before each warning/error/critical record, the ring entries of the last
+    seconds seconds that were not written yet go to the log file, oldest first.
+
+    INPUT:
+      - shared (_SharedFile) = shared log file
+      - recorder (_FlightRecorder) = ring buffer of recent debug/info records
+      - seconds (float) = how far back before the alert record ring entries are written
+    """
+    def __init__(self, shared: _SharedFile, recorder: _FlightRecorder, seconds: float):
+        super().__init__(shared)
+        self.recorder = recorder
+        self.seconds = seconds
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Extend: write the recent ring entries before record.
+        """
+        try:
+            self.recorder.dump(self.shared, record.created - self.seconds)
+        except Exception:
+            self.handleError(record)
+        super().emit(record)
+
+
+class _CollectorHandler(logging.Handler):
+    """
+    Handler shipping records to a collector process over a local (Unix domain) socket.
+
+    Each record is sent as a 4-byte big-endian length followed by the record's attributes as JSON
+    (message arguments and traceback already rendered). Sending blocks while the collector's socket buffer
+    is full, so a slow collector applies backpressure to the workers rather than growing memory. Like
+    logging.handlers.SocketHandler (not subclassed, see _BoundedQueueHandler), a failed connection is
+    retried after retry_start seconds, doubling up to retry_max; records logged meanwhile are dropped.
+
+    INPUT:
+      - address (str) = path of the collector's Unix domain socket
+      - timeout (float | None)(optional) = seconds a send may block before the record is dropped
+                                           (default None, wait for the collector)
+      - renderer (_TracebackRenderer)(optional) = traceback renderer (default, logging.Formatter's)
+
+    INSTANCE VARIABLES:
+      - sent (int) = count of records delivered to the collector's socket
+      - sent_bytes (int) = bytes delivered to the collector's socket
+      - dropped (int) = count of records lost (collector unreachable, send timeout or error)
+      - dropped_levels (dict) = count of records lost, by level name
+
+    REFERENCES:
+      - logging.handlers.SocketHandler -- See https://docs.python.org/3/library/logging.handlers.html#sockethandler
+    """
+    retry_start = 1.0
+    retry_max = 30.0
+
+    def __init__(self, address: str, timeout: float | None = None, renderer: _TracebackRenderer | None = None):
+        import json
+
+        super().__init__()
+        self.address = address
+        self.timeout = timeout
+        self.sock = None
+        self._retry_time = None
+        self._retry_period = self.retry_start
+        self.sent = 0
+        self.sent_bytes = 0
+        self.dropped = 0
+        self.dropped_levels = {}
+        self._exc_formatter = _CompiledFormatter('%(message)s', renderer=renderer)
+        self._pid = os.getpid()
+        self._dumps = json.dumps
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Override: send record, counting a lost record by its level.
+        """
+        dropped = self.dropped
+        try:
+            self.send(self.makePickle(record))
+        except Exception:
+            self.handleError(record)
+        if self.dropped != dropped:
+            self.dropped_levels[record.levelname] = self.dropped_levels.get(record.levelname, 0) + 1
+
+    def makeSocket(self) -> 'socket.socket':
+        """
+        Connect to the collector's Unix domain socket with this handler's send timeout.
+        """
+        import socket
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def createSocket(self) -> None:
+        """
+        Connect, unless a failed connection is waiting for its retry time.
+        """
+        now = time.time()
+        if self._retry_time is not None and now < self._retry_time:
+            return
+        try:
+            self.sock = self.makeSocket()
+            self._retry_time = None
+        except OSError:
+            if self._retry_time is None:
+                self._retry_period = self.retry_start
+            else:
+                self._retry_period = min(self._retry_period * 2, self.retry_max)
+            self._retry_time = now + self._retry_period
+
+    def makePickle(self, record: logging.LogRecord) -> bytes:
+        """
+        Serialize record as length-prefixed JSON (the collector never unpickles worker data).
+        """
+        data = dict(record.__dict__)
+        data['msg'] = record.getMessage()
+        data['args'] = None
+        if record.exc_info and not record.exc_text:
+            data['exc_text'] = self._exc_formatter.formatException(record.exc_info)
+        data['exc_info'] = None
+        data.pop('message', None)
+        if type(record.__dict__.get('context')) is _Context:
+            data['context'] = record.context.fields
+        payload = self._dumps(data, default=str, ensure_ascii=False).encode('utf-8')
+        return struct.pack('>L', len(payload)) + payload
+
+    def send(self, s: bytes) -> None:
+        """
+        Send one record, counting it as dropped when the collector cannot take it.
+
+        A connection inherited from a parent process (e.g. a pre-fork pool) is replaced, so that
+        workers never interleave records on a shared socket.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+        if self.sock is None:
+            self.createSocket()
+        if self.sock is None:
+            self.dropped += 1
+            return
+        try:
+            self.sock.sendall(s)
+            self.sent += 1
+            self.sent_bytes += len(s)
+        except OSError:
+            # A partial send leaves the stream misaligned; reconnect for the next record.
+            self.sock.close()
+            self.sock = None
+            self.dropped += 1
+
+    def handleError(self, record: logging.LogRecord) -> None:
+        """
+        Extend: count the record as dropped.
+        """
+        self.dropped += 1
+        super().handleError(record)
+
+    def close(self) -> None:
+        """
+        Extend: close the connection to the collector.
+        """
+        with self.lock:
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+        super().close()
+
+
+class _RateLimitFilter(logging.Filter):
+    """
+    Logger filter limiting repeated warning (and higher) records with a token bucket per kind of record.
+
+    PURPOSE: Keep an error storm (e.g. the same exception thousands of times a second) from flooding
+             disk and CPU, while still reporting how much was suppressed.
+
+    Records are alike when they share logger name, level, message template (record.msg, before arguments;
+    its type when it is not a string), exception type and call site (pathname, lineno). Each kind may log
+    burst records at once, refilled at rate records per second; others are dropped. The next record of that
+    kind that passes ends with '[suppressed N similar records]', and every summary_interval seconds (checked
+    as records arrive, and at teardown) the logger gets one summary record for each kind still holding
+    suppressed records.
+
+    INPUT:
+      - logger (logging.Logger) = logger the filter is added to (summary records are logged to it)
+      - rate (float) = records per second allowed for each kind of record
+      - burst (int)(optional) = records allowed at once for each kind (default 10)
+      - summary_interval (float)(optional) = seconds between summaries (default 60)
+      - level (int)(optional) = lowest level limited (default logging.WARNING)
+      - max_kinds (int)(optional) = kinds tracked before the oldest are forgotten (default 10000)
+
+    INSTANCE VARIABLES:
+      - suppressed (int) = count of records dropped by the filter
+
+    REFERENCES:
+      - logging.Filter -- See https://docs.python.org/3/library/logging.html#filter-objects
+    """
+    def __init__(self, logger: logging.Logger, rate: float, burst: int = 10, summary_interval: float = 60,
+                 level: int = logging.WARNING, max_kinds: int = 10000):
+        super().__init__()
+        self.logger = logger
+        self.rate = rate
+        self.burst = burst
+        self.summary_interval = summary_interval
+        self.level = level
+        self.max_kinds = max_kinds
+        self.suppressed = 0
+        self._buckets = {}  # kind -> [tokens, last refill time, suppressed count, template, funcName]
+        self._lock = threading.Lock()
+        self._next_summary = time.time() + summary_interval
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Override: return false (drop) when record's kind has no token left.
+        """
+        if record.levelno < self.level or getattr(record, 'rate_limit_summary', False):
+            return True
+        exc_type = record.exc_info[0] if record.exc_info else None
+        # A message that is not a template (e.g. a dict) may be unhashable: key it by type.
+        template = record.msg if isinstance(record.msg, str) else type(record.msg)
+        kind = (record.name, record.levelno, template, exc_type, record.pathname, record.lineno)
+        now = record.created
+        with self._lock:
+            bucket = self._buckets.get(kind)
+            if bucket is None:
+                if len(self._buckets) >= self.max_kinds:
+                    del self._buckets[next(iter(self._buckets))]
+                bucket = self._buckets[kind] = [self.burst, now, 0, record.msg, record.funcName]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            allowed = tokens >= 1
+            if allowed:
+                bucket[0] = tokens - 1
+                suppressed, bucket[2] = bucket[2], 0
+            else:
+                bucket[0] = tokens
+                bucket[2] += 1
+                self.suppressed += 1
+            summary_due = now >= self._next_summary
+        if allowed and suppressed:
+            record.msg = f'{record.msg} [suppressed {suppressed} similar records]'
+        if summary_due:
+            self.flush(now)
+        return allowed
+
+    def flush(self, now: float | None = None) -> None:
+        """
+        Log a summary record for each kind of record with suppressed records, and reset their counts.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._next_summary = now + self.summary_interval
+            summaries = []
+            for (name, levelno, _, exc_type, pathname, lineno), bucket in self._buckets.items():
+                if bucket[2]:
+                    summaries.append((name, levelno, pathname, lineno, bucket[4], exc_type, bucket[3], bucket[2]))
+                    bucket[2] = 0
+        for name, levelno, pathname, lineno, func, exc_type, template, count in summaries:
+            exc_name = '' if exc_type is None else f' ({exc_type.__name__})'
+            summary = self.logger.makeRecord(
+                name, levelno, pathname, lineno, 'suppressed %d similar records%s: %s',
+                (count, exc_name, template), None, func, extra={'rate_limit_summary': True}
+            )
+            self.logger.handle(summary)
+
+
+class _Histogram:
+    """
+    Duration histogram with power-of-two nanosecond buckets (callers serialize add()).
+
+    INSTANCE VARIABLES:
+      - counts (list) = counts[i] durations of fewer than 2**i (and at least 2**(i-1)) nanoseconds
+      - total (int) = sum of durations, in nanoseconds
+      - max (int) = longest duration, in nanoseconds
+    """
+    BUCKETS = 40  # the last bucket holds everything from about 4.6 minutes up
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns: int) -> None:
+        self.counts[min(ns.bit_length(), self.BUCKETS - 1)] += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def snapshot(self) -> dict:
+        """
+        Return count, total_ns, max_ns and the non-empty buckets ({'<2**i ns upper bound': count}).
+        """
+        return {'count': sum(self.counts), 'total_ns': self.total, 'max_ns': self.max,
+                'buckets': {str(1 << i): count for i, count in enumerate(self.counts) if count}}
+
+
+def _count_level(counts: dict, record: logging.LogRecord) -> None:
+    counts[record.levelname] = counts.get(record.levelname, 0) + 1
+
+
+class _HandlerMetrics:
+    """
+    Self-metrics of one handler, collected by wrapping its filter, format and emit methods on the instance.
+
+    PURPOSE: Show how much time the logging call path spends in each handler, and what it writes or loses.
+             Unwrapped handlers (metrics off, the default) run exactly as before, at no extra cost.
+
+    The format timings are of the step that renders the record for this handler: format() (text/json),
+    the formatter's format_bytes() (binary), prepare() ('async'/'asyncio' queue handler), or makePickle()
+    ('multiprocess' collector handler). Emit timings include formatting.
+
+    INPUT:
+      - role (str) = handler's role: 'fyi', 'alert', 'queue' or 'collector'
+      - handler (logging.Handler) = handler to instrument
+
+    INSTANCE VARIABLES:
+      - emitted (dict) = count of records accepted by the handler's level and filters, by level name
+      - bytes (int) = bytes written to the log file, stream or collector socket
+      - filter_ns, format_ns, emit_ns (_Histogram) = durations of the handler's filter, format and emit steps
+      - queue_max_depth (int) = deepest 'async'/'asyncio' queue seen after an enqueue
+    """
+    def __init__(self, role: str, handler: logging.Handler):
+        self.role = role
+        self.handler = handler
+        self.emitted = {}
+        self.bytes = 0
+        self.filter_ns = _Histogram()
+        self.format_ns = _Histogram()
+        self.emit_ns = _Histogram()
+        self.queue_max_depth = 0
+        self._lock = threading.Lock()  # filter() runs before the handler takes its lock, if it takes one
+        self._install()
+
+    def _install(self) -> None:
+        handler = self.handler
+        clock = time.perf_counter_ns
+        handler_filter = handler.filter
+        handler_emit = handler.emit
+
+        def filter(record: logging.LogRecord):
+            start = clock()
+            result = handler_filter(record)
+            elapsed = clock() - start
+            with self._lock:
+                self.filter_ns.add(elapsed)
+            return result
+
+        # The step rendering a record, and where its bytes are counted.
+        if isinstance(handler, _BoundedQueueHandler):
+            owner, name = handler, 'prepare'
+        elif isinstance(handler, _CollectorHandler):
+            owner, name = handler, 'makePickle'
+        elif hasattr(handler.formatter, 'format_bytes'):
+            owner, name = handler.formatter, 'format_bytes'
+        else:
+            owner, name = handler, 'format'
+        render = getattr(owner, name)
+        count_text = not isinstance(handler, (_SharedFileHandler, _CollectorHandler, _BoundedQueueHandler))
+        encoding = getattr(getattr(handler, 'stream', None), 'encoding', None) or 'utf-8'
+
+        def format(record: logging.LogRecord):
+            start = clock()
+            result = render(record)
+            elapsed = clock() - start
+            with self._lock:
+                self.format_ns.add(elapsed)
+                if count_text:  # stream handlers: the formatted text and terminator
+                    self.bytes += len(result.encode(encoding, 'replace')) + len(handler.terminator)
+            return result
+
+        if isinstance(handler, _SharedFileHandler):
+            def written() -> int:
+                return handler.shared.bytes_written
+        elif isinstance(handler, _CollectorHandler):
+            def written() -> int:
+                return handler.sent_bytes
+        else:
+            written = None
+        log_queue = handler.queue if isinstance(handler, _BoundedQueueHandler) else None
+
+        def emit(record: logging.LogRecord) -> None:
+            start = clock()
+            before = written() if written is not None else 0
+            handler_emit(record)
+            elapsed = clock() - start
+            depth = log_queue.qsize() if log_queue is not None else 0
+            with self._lock:
+                self.emit_ns.add(elapsed)
+                _count_level(self.emitted, record)
+                if written is not None:
+                    self.bytes += written() - before
+                if depth > self.queue_max_depth:
+                    self.queue_max_depth = depth
+
+        handler.filter = filter
+        handler.emit = emit
+        setattr(owner, name, format)
+
+    def snapshot(self) -> dict:
+        """
+        Return the handler's metrics as a JSON-serializable dict.
+        """
+        handler = self.handler
+        with handler.lock, self._lock:  # the emit path holds handler.lock, filter() self._lock
+            metrics = {
+                'handler': type(handler).__name__,
+                'emitted': dict(self.emitted),
+                'dropped': dict(getattr(handler, 'dropped_levels', {})),
+                'bytes': self.bytes,
+                'filter_ns': self.filter_ns.snapshot(),
+                'format_ns': self.format_ns.snapshot(),
+                'emit_ns': self.emit_ns.snapshot(),
+            }
+        if isinstance(handler, _BoundedQueueHandler):
+            metrics['queue'] = {'depth': handler.queue.qsize(), 'max_depth': self.queue_max_depth,
+                                'capacity': handler.queue.maxsize}
+        return metrics
+
+
+class _LoggerMetrics:
+    """
+    Self-metrics of a logger configured by setup(), and of its handlers, with an optional snapshot file.
+
+    Counts the records reaching the logger's handlers and those suppressed by its filters (e.g. rate
+    limiting), by level, timing the logger's filters. With a snapshot file, a daemon thread rewrites it
+    (atomically, via a temporary file) with snapshot() every interval seconds, and once more at close().
+
+    INPUT:
+      - logger (logging.Logger) = logger to instrument
+      - handlers (list) = (role, handler) pairs to instrument
+      - snapshot_file (str)(optional) = path of the JSON snapshot file (default None, no file)
+      - interval (float)(optional) = seconds between snapshot file writes (default 60)
+    """
+    def __init__(self, logger: logging.Logger, handlers: list[tuple], snapshot_file: str | None = None,
+                 interval: float = 60):
+        self.logger = logger
+        self.handlers = [_HandlerMetrics(role, handler) for role, handler in handlers]
+        self.snapshot_file = snapshot_file
+        self.interval = interval
+        self.records = {}
+        self.suppressed = {}
+        self.filter_ns = _Histogram()
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer = None
+
+        clock = time.perf_counter_ns
+        logger_filter = logger.filter
+
+        def filter(record: logging.LogRecord):
+            start = clock()
+            result = logger_filter(record)
+            elapsed = clock() - start
+            with self._lock:
+                self.filter_ns.add(elapsed)
+                _count_level(self.records if result else self.suppressed, record)
+            return result
+
+        logger.filter = self._filter = filter
+        if snapshot_file is not None:
+            self._writer = threading.Thread(target=self._run_writer, name='config_log-metrics', daemon=True)
+            self._writer.start()
+
+    def snapshot(self) -> dict:
+        """
+        Return the logger's and its handlers' metrics as a JSON-serializable dict.
+        """
+        with self._lock:
+            metrics = {'logger': self.logger.name, 'time': time.time(), 'uptime_s': time.time() - self.started,
+                       'records': dict(self.records), 'suppressed': dict(self.suppressed),
+                       'filter_ns': self.filter_ns.snapshot()}
+        metrics['handlers'] = {handler.role: handler.snapshot() for handler in self.handlers}
+        return metrics
+
+    def write_snapshot(self) -> None:
+        """
+        Replace the snapshot file with a fresh snapshot.
+        """
+        import json
+
+        temporary = f'{self.snapshot_file}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file, indent=2)
+        os.replace(temporary, self.snapshot_file)
+
+    def _run_writer(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write_snapshot()
+            except OSError:
+                pass  # try again next interval
+
+    def detach(self) -> None:
+        """
+        Unwrap the logger's filter method (unless a newer configuration's metrics wrapped it since).
+        """
+        if self.logger.__dict__.get('filter') is self._filter:
+            del self.logger.filter
+
+    def close(self) -> None:
+        """
+        Unwrap the logger's filter method, stop the snapshot writer, and write the final snapshot.
+        """
+        self.detach()
+        if self._writer is not None:
+            self._stop.set()
+            self._writer.join()
+            self.write_snapshot()
+
+
+class _LoggerConfig:
+    """
+    Record of the handlers (and listener, if any) that setup() attached to one named logger.
+
+    INSTANCE VARIABLES:
+      - key (tuple) = (logger_name, destination, options) the logger was configured with
+      - logger (logging.Logger) = configured logger instance
+      - handlers (list) = handlers attached to logger
+      - listener (_QueueListener | None) = background listener running the fyi/alert handlers ('async'/'asyncio')
+      - fields (frozenset) = LogRecord attribute names referenced by the logger's formats
+      - filters (list) = filters added to logger (e.g. _RateLimitFilter)
+      - metrics (_LoggerMetrics | None) = self-metrics of the logger and its handlers, when enabled
+    """
+    def __init__(self, key: tuple, logger: logging.Logger, handlers: list[logging.Handler],
+                 listener: _QueueListener | None = None):
+        self.key = key
+        self.logger = logger
+        self.handlers = handlers
+        self.listener = listener
+        self.fields = frozenset()
+        self.filters = []
+        self.metrics = None
+
+    def roles(self) -> list[tuple[str, logging.Handler]]:
+        """
+        Return (role, handler) pairs: 'fyi' and 'alert', behind 'queue' in 'async'/'asyncio' mode, or 'collector'.
+        """
+        if self.listener is not None:
+            return [('queue', self.handlers[0]), *zip(('fyi', 'alert'), self.listener.handlers)]
+        if isinstance(self.handlers[0], _CollectorHandler):
+            return [('collector', self.handlers[0])]
+        return list(zip(('fyi', 'alert'), self.handlers))
+
+    def flush(self) -> None:
+        """
+        Wait until the listener (if any) has handled every queued record, then flush the handlers.
+        """
+        if self.listener is not None:
+            self.listener.queue.join()
+            for handler in self.listener.handlers:
+                handler.flush()
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self) -> None:
+        """
+        Remove the filters (logging pending rate limit summaries), then detach and close the handlers,
+        first stopping (flushing) the listener, if any, and finally write the last metrics snapshot.
+        """
+        for logger_filter in self.filters:
+            self.logger.removeFilter(logger_filter)
+            if isinstance(logger_filter, _RateLimitFilter):
+                logger_filter.flush()
+        for handler in self.handlers:
+            self.logger.removeHandler(handler)
+        if self.listener is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+        for handler in self.handlers:
+            handler.close()
+        if self.metrics is not None:
+            self.metrics.close()
+
+
+# Loggers configured by setup(), keyed by logger name; configurations reconfigure() is replacing, keyed by
+# logger name; and replaced configurations waiting to be closed, keyed by id().
+_configs: dict[str, _LoggerConfig] = {}
+_configs_lock = threading.RLock()
+_replacing: dict[str, _LoggerConfig] = {}
+_retiring: dict[int, _LoggerConfig] = {}
+
+
+def _skip_caller_lookup(logger: logging.Logger) -> None:
+    """
+    Stop logger walking the stack for caller fields (pathname, lineno, ...) that no active format shows.
+
+    Records still get a stack walk when stack_info=True is requested. Undo with _restore_caller_lookup().
+    """
+    find_caller = type(logger).findCaller.__get__(logger)
+
+    def findCaller(stack_info: bool = False, stacklevel: int = 1) -> tuple:
+        if stack_info:
+            return find_caller(stack_info, stacklevel + 1)
+        return '(unknown file)', 0, '(unknown function)', None
+
+    logger.findCaller = findCaller
+
+
+def _restore_caller_lookup(logger: logging.Logger) -> None:
+    """
+    Undo _skip_caller_lookup().
+    """
+    logger.__dict__.pop('findCaller', None)
+
+
+# The logging module's record switches (logThreads, logProcesses, logMultiprocessing) before the first
+# setup() configuration changed them; restored when the last configuration is removed.
+_saved_switches: tuple | None = None
+
+
+def _handler_format_fields(loggers: list, names) -> frozenset:
+    """
+    Return the names (record fields) that the formatters of handlers attached to loggers may reference.
+
+    A format is searched for the field names as plain text, whatever its style ('%', '{' or '$'), so the
+    result errs on the side of collecting a field.
+    """
+    fields = set()
+    for logger in loggers:
+        for handler in list(logger.handlers):
+            formatter = handler.formatter
+            if formatter is None:  # logging's default format, '%(message)s'
+                continue
+            fmt = getattr(formatter, '_fmt', None) or ''
+            fields.update(name for name in names if name in fmt)
+    return frozenset(fields)
+
+
+def _other_format_fields() -> frozenset:
+    """
+    Return the record switch fields (thread, threadName, process, processName) that the formatters of
+    handlers attached to any logger of the process may reference.
+    """
+    loggers = [logging.getLogger()] + [logger for logger in list(logging.Logger.manager.loggerDict.values())
+                                       if isinstance(logger, logging.Logger)]
+    return _handler_format_fields(loggers, ('thread', 'threadName', 'process', 'processName'))
+
+
+def _propagated_caller_fields(logger: logging.Logger) -> frozenset:
+    """
+    Return the caller fields (see _CALLER_FIELDS) that the formatters of handlers seeing logger's records
+    (its own, and its ancestors' while records propagate) may reference.
+    """
+    loggers = []
+    current = logger
+    while current is not None:  # the chain logging.Logger.callHandlers() walks
+        loggers.append(current)
+        current = current.parent if current.propagate else None
+    return _handler_format_fields(loggers, _CALLER_FIELDS)
+
+
+def _apply_record_switches() -> None:
+    """
+    Set the logging module's thread/process record switches to what the process's formats reference.
+
+    These switches are global: they apply to every record of the process. A switch is only turned off when
+    neither a setup() format nor the formatter of any handler attached to a logger references its fields:
+    logging.logThreads (thread, threadName), logging.logProcesses (process), logging.logMultiprocessing
+    (processName). Handlers attached after setup(), or formatters whose format() does not use their format
+    string, are not seen; set the switches on again (logging.logThreads = True, ...) for them. The bound
+    context fields (context) are collected by a record factory while some setup() format references them.
+    With no setup() configuration left, the switches return to their values before the first setup() and
+    the record factory is removed.
+
+    REFERENCES:
+      - logging -- See https://docs.python.org/3/howto/logging.html#optimization
+    """
+    global _saved_switches
+    with _configs_lock:
+        if not _configs:
+            if _saved_switches is not None:
+                logging.logThreads, logging.logProcesses, logging.logMultiprocessing = _saved_switches
+                _saved_switches = None
+            _install_context_factory(False)
+            return
+        if _saved_switches is None:
+            _saved_switches = (logging.logThreads, logging.logProcesses, logging.logMultiprocessing)
+        fields = frozenset().union(*(config.fields for config in _configs.values())) | _other_format_fields()
+        logging.logThreads = bool(fields & _THREAD_FIELDS)
+        logging.logProcesses = 'process' in fields
+        logging.logMultiprocessing = 'processName' in fields
+        _install_context_factory('context' in fields)
+
+
+def _build_handlers(logfile_path_name: str | None, mode: str, queue_size: int, overflow: str,
+                    fmt_fyi: str, fmt_alert: str, collector_address: str | None = None,
+                    collector_timeout: float | None = None, max_bytes: int = 0, rotate_interval: float = 0,
+                    backup_count: int = 0, compress: str | None = None, batch_records: int = 0,
+                    batch_bytes: int = 0, batch_ms: float = 0, output_format: str = 'text',
+                    traceback_max_frames: int = 0, traceback_max_chars: int = 0,
+                    traceback_source_lines: bool = True, flight_recorder_bytes: int = 0,
+                    flight_recorder_seconds: float = 60,
+                    replace_file: bool = False) -> tuple[list[logging.Handler], _QueueListener | None]:
+    """
+    Create the fyi/alert handler pair (behind a queue in 'async'/'asyncio' mode) for setup(), or, in
+    'multiprocess' mode, the handler shipping records to the collector.
+
+    INPUT: see setup(), and
+      - replace_file (bool)(optional) = open the log file anew if it is open with other rotation/batching
+                                        options (see _SharedFile.open()), for reconfigure() (default False)
+
+    OUTPUT:
+      - handlers (list) = handlers to attach to the logger
+      - listener (_QueueListener | None) = started listener running the fyi/alert handlers ('async'/'asyncio')
+    """
+    # Define filter functions
+    def filter_fyi(record: logging.LogRecord) -> bool:
+        """
+        Filter to accept logging records with level less than or equal to info level, otherwise ignore.
+
+        USAGE: 
+        - handler.addFilter(filter_fyi)
+
+        INPUT:
+        - record (logging.LogRecord) = logging record instance -- see https://docs.python.org/3/library/logging.html#logging.LogRecord
+
+        OUTPUT:
+        - (bool) = true to accept, false to ignore
+
+        REFERENCES:
+        - logging -- See https://docs.python.org/3/library/logging.html
+        """
+        return record.levelno <= 20 # logging.INFO value
+
+
+    # Render tracebacks with a cache shared by loggers with the same traceback options.
+    renderer = _TracebackRenderer.get(traceback_max_frames, traceback_max_chars, traceback_source_lines)
+
+    # Ship records to the collector process, which owns the log file and its fyi/alert handler pair.
+    if mode == 'multiprocess':
+        address = _collector_address(logfile_path_name, collector_address)
+        return [_CollectorHandler(address, collector_timeout, renderer)], None
+
+    # Create logging formatters for handlers, compiled once per format. First: a format the output format
+    # cannot hold raises ValueError before the log file is opened.
+    # See https://docs.python.org/3/howto/logging.html#formatters
+    formatter_class = {'text': _CompiledFormatter, 'json': _JsonFormatter, 'binary': _BinaryFormatter}[output_format]
+    formatter_fyi = formatter_class(fmt_fyi, DATEFMT, renderer)
+    formatter_alert = formatter_class(fmt_alert, DATEFMT, renderer)
+
+    # Create logging handlers for storage or display (stderr), as desired
+    # See https://docs.python.org/3/library/logging.handlers.html
+    if logfile_path_name == None: # logging record messages to stderr
+        handler_fyi = logging.StreamHandler()
+        handler_alert = logging.StreamHandler()
+    else:  # logging record messages to logfile_path_name
+        # Both handlers share one file descriptor, buffer and lock; each holds (and on close releases) its
+        # own reference to it.
+        def open_shared_file() -> _SharedFile:
+            return _SharedFile.open(logfile_path_name, encoding='utf-8', replace=replace_file, max_bytes=max_bytes,
+                                    rotate_interval=rotate_interval, backup_count=backup_count,
+                                    compress=compress, batch_records=batch_records,
+                                    batch_bytes=batch_bytes, batch_ms=batch_ms)
+        if flight_recorder_bytes:  # debug/info records go to the ring, written out before alerts
+            recorder = _FlightRecorder.open(logfile_path_name + '.ring', flight_recorder_bytes)
+            try:
+                shared = open_shared_file()
+            except BaseException:  # e.g. open with other rotation/batching options: keep no ring reference
+                recorder.release()
+                raise
+            handler_fyi = _FlightRecorderHandler(recorder)
+            handler_alert = _FlightRecorderAlertHandler(shared, recorder, flight_recorder_seconds)
+        else:
+            handler_fyi = _SharedFileHandler(open_shared_file())
+            handler_alert = _SharedFileHandler(open_shared_file())
+    
+    # Set logging handlers' level.
+    handler_fyi.setLevel(logging.DEBUG)
+    handler_alert.setLevel(logging.WARNING)
+    
+    # Add handler filter.
+    # See https://docs.python.org/3/library/logging.html#filter-objects
+    handler_fyi.addFilter(filter_fyi)
+
+    # Set logging formatters for handlers.
+    handler_fyi.setFormatter(formatter_fyi)
+    handler_alert.setFormatter(formatter_alert)
+
+    # Return handlers to add to the logger, directly or behind a bounded queue whose
+    # listener thread runs the fyi/alert handlers until teardown() (at latest, interpreter exit).
+    # See https://docs.python.org/3/howto/logging-cookbook.html#dealing-with-handlers-that-block
+    if mode in ('async', 'asyncio'):
+        import queue
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        listener = _QueueListener(log_queue, handler_fyi, handler_alert)
+        listener.start()
+        queue_handler_class = _AsyncioQueueHandler if mode == 'asyncio' else _BoundedQueueHandler
+        return [queue_handler_class(log_queue, overflow, renderer)], listener
+    return [handler_fyi, handler_alert], None
+
+
+def _resolve_level(level: int | str | None) -> int:
+    """
+    Return the numeric logger level for setup(): level, else the LEVEL_ENV_VAR environment variable,
+    else logging.DEBUG. Raises ValueError for an unknown level name.
+    """
+    if level is None:
+        level = os.environ.get(LEVEL_ENV_VAR) or logging.DEBUG
+    if isinstance(level, str):
+        name = level.strip().upper()
+        level = int(name) if name.isdigit() else logging.getLevelName(name)
+        if not isinstance(level, int):
+            raise ValueError(f'unknown logging level {name!r}')
+    return level
+
+
+def setup(logger_name: str, logfile_path_name: str | None = None, mode: str = 'sync',
+          queue_size: int = 10000, overflow: str = 'block', fmt_fyi: str = FMT_FYI,
+          fmt_alert: str = FMT_ALERT, collector_address: str | None = None,
+          collector_timeout: float | None = None, max_bytes: int = 0, rotate_interval: float = 0,
+          backup_count: int = 0, compress: str | None = None, batch_records: int = 0,
+          batch_bytes: int = 0, batch_ms: float = 0, output_format: str = 'text', rate_limit: float = 0,
+          rate_burst: int = 10, rate_summary_interval: float = 60, traceback_max_frames: int = 0,
+          traceback_max_chars: int = 0, traceback_source_lines: bool = True, metrics: bool = False,
+          metrics_file: str | None = None, metrics_interval: float = 60,
+          level: int | str | None = None, flight_recorder_bytes: int = 0,
+          flight_recorder_seconds: float = 60) -> logging.Logger:
+    """
+    Setup configuration of logging to file or stderr (e.g. info, debug, warning, error, critical).
+
+    PURPOSE: Store or display helpful logging record messages for testing and debugging.
+
+    USAGE: 
+        from config_log import setup
+        [ … other imports and definitions … ]
+        if __name__ == '__main__':
+            logger = config_log.setup(logger_name, logfile_path_name) [--OR-- logger = config_log.setup(logger_name) # to stderr ]
+
+    INPUT:
+      - logger_name (str) = name of logger instance (e.g. __name__)
+      - logfile_path_name (str)(optional) = path and name of log file, if omitted stream to stderr
+                                            (e.g. D:\\application\\logs\\execution.log)
+      - mode (str)(optional) = 'sync' (default) writes on the caller's thread;
+                               'async' enqueues records and writes on one background listener thread;
+                               'asyncio' is 'async' for event loop programs: logging from a coroutine never
+                               waits, records carry %(taskName)s (shown in the default alert format), and
+                               aflush()/ateardown() can be awaited;
+                               'multiprocess' ships records to a collector process (see start_collector())
+      - queue_size (int)(optional) = maximum queued records in 'async'/'asyncio' mode (default 10000)
+      - overflow (str)(optional) = 'async' full-queue policy: 'block' (default), 'drop_oldest', or 'drop_fyi'
+                                   (drop debug/info records first); on an event loop thread in 'asyncio'
+                                   mode, 'block' drops the oldest record instead of waiting
+      - fmt_fyi (str)(optional) = %-style format of debug/info records (default FMT_FYI)
+      - fmt_alert (str)(optional) = %-style format of warning/error/critical records (default FMT_ALERT, or
+                                    FMT_ALERT_ASYNCIO in 'asyncio' mode)
+      - collector_address (str)(optional) = 'multiprocess' collector socket path (default logfile_path_name + '.sock')
+      - collector_timeout (float)(optional) = 'multiprocess' seconds a send may block before the record is
+                                              dropped (default None, wait for the collector)
+      - max_bytes (int)(optional) = rotate the log file before it would exceed this size (default 0, never)
+      - rotate_interval (float)(optional) = rotate the log file every this many seconds (default 0, never)
+                                            (e.g. 86400 for daily)
+      - backup_count (int)(optional) = rotated segments to keep (default 0, keep all)
+      - compress (str)(optional) = compress rotated segments in the background: 'gzip' or 'zstd'
+                                   (default None, no compression)
+      - batch_records (int)(optional) = write the log file in batches of this many records (default 0, off)
+      - batch_bytes (int)(optional) = write a batch once this many bytes are pending (default 0, off)
+      - batch_ms (float)(optional) = write a batch once its oldest record is this many milliseconds old
+                                     (default 0, off); error/critical records, exit and SIGTERM write at once
+      - output_format (str)(optional) = 'text' (default, fmt_fyi/fmt_alert layout); 'json' (one JSON object
+                                        per line with the format's fields); or 'binary' (length-prefixed
+                                        records, log file only) -- read either back with read_records()
+      - rate_limit (float)(optional) = records per second allowed for each kind of repeated warning/error/
+                                       critical record (same logger, level, message template, exception
+                                       type and call site); others are suppressed (default 0, no limit)
+      - rate_burst (int)(optional) = records of each kind allowed at once under rate_limit (default 10)
+      - rate_summary_interval (float)(optional) = seconds between 'suppressed N similar records' summaries
+                                                  (default 60)
+      - traceback_max_frames (int)(optional) = innermost traceback frames shown per exception (default 0, all)
+      - traceback_max_chars (int)(optional) = traceback characters kept, from the end (default 0, all)
+      - traceback_source_lines (bool)(optional) = show source lines in tracebacks (default True); false
+                                                  never reads source files (linecache)
+      - metrics (bool)(optional) = collect self-metrics of the logger and its handlers (default False, no
+                                   cost): records and drops per level, bytes, filter/format/emit times,
+                                   queue depth -- see get_metrics()
+      - metrics_file (str)(optional) = also rewrite this JSON file with the logger's metrics every
+                                       metrics_interval seconds and at teardown (default None; implies metrics)
+      - metrics_interval (float)(optional) = seconds between metrics_file snapshots (default 60)
+      - level (int | str)(optional) = logger level, a number or name (e.g. 'INFO'); default, the
+                                      CONFIG_LOG_LEVEL environment variable, or else 'DEBUG'
+      - flight_recorder_bytes (int)(optional) = size of a "flight recorder": debug/info records go to a ring
+                                                buffer file of this many bytes (logfile_path_name + '.ring',
+                                                memory-mapped, kept after a crash -- see read_flight_recorder())
+                                                instead of the log file (default 0, off)
+      - flight_recorder_seconds (float)(optional) = on each warning/error/critical record, first write the
+                                                    ring's records of this many seconds before it (default 60)
+
+    OUTPUT:
+      - logger (logging.Logger) = logger instance
+
+    NOTES:
+      - setup() is idempotent: a repeat call with the same logger_name, destination and options returns
+        the already configured logger without adding handlers. Calling it with different options for a
+        configured logger raises ValueError; use reconfigure() (or teardown() then setup()) instead.
+      - The logger level gates records before any LogRecord is built: a disabled call (e.g. debug() under
+        level='INFO') costs one cached integer comparison. Pass expensive message arguments through lazy()
+        so they are only computed for records that are logged.
+      - Records only collect what the active formats reference: the caller stack walk is skipped for this
+        logger unless a format shows pathname/filename/module/funcName/lineno (a setup() format, or the
+        formatter of a handler attached to the logger or to an ancestor its records propagate to), or
+        rate_limit, which keys records by call site, is set. Handlers attached after setup() are not seen;
+        call reconfigure() for them. The logging module's
+        logThreads/logProcesses/logMultiprocessing switches (which apply to the whole process) are turned
+        off only while no setup() format and no other handler's formatter references their fields (see
+        _apply_record_switches()); they are restored when the last configuration is torn down.
+      - Fields bound with bind()/bound() reach records through a record factory, installed while some
+        setup() format references %(context)s (both defaults do): the fyi and alert text formats show them
+        before the message, 'json' output as a "context" object, and 'binary' output as JSON.
+
+    REFERENCES:
+      - logging -- See https://docs.python.org/3/library/logging.html
+    """
+    # Validate handler options.
+    if mode not in MODES:
+        raise ValueError(f'mode must be one of {MODES}, not {mode!r}')
+    if overflow not in OVERFLOW_POLICIES:
+        raise ValueError(f'overflow must be one of {OVERFLOW_POLICIES}, not {overflow!r}')
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f'output_format must be one of {OUTPUT_FORMATS}, not {output_format!r}')
+    if output_format == 'binary' and logfile_path_name is None:
+        raise ValueError("output_format 'binary' needs logfile_path_name")
+    if compress is not None:
+        if compress not in COMPRESSIONS:
+            raise ValueError(f'compress must be one of {tuple(COMPRESSIONS)} or None, not {compress!r}')
+        _open_compressed(os.devnull, compress).close()  # fail now, not in the background, if unavailable
+    if mode == 'multiprocess' and logfile_path_name is None and collector_address is None:
+        raise ValueError("mode 'multiprocess' needs logfile_path_name or collector_address")
+    if flight_recorder_bytes and (logfile_path_name is None or mode == 'multiprocess'):
+        raise ValueError('flight_recorder_bytes needs logfile_path_name, and is set on start_collector() in'
+                         " 'multiprocess' mode")
+    if flight_recorder_bytes and flight_recorder_bytes < 4096:
+        raise ValueError('flight_recorder_bytes must be at least 4096')
+    level = _resolve_level(level)
+    if mode == 'asyncio' and fmt_alert == FMT_ALERT:
+        fmt_alert = FMT_ALERT_ASYNCIO
+
+    # Return the registered logger when already configured the same way (no duplicate handlers).
+    handler_options = {'mode': mode, 'queue_size': queue_size, 'overflow': overflow,
+                       'fmt_fyi': fmt_fyi, 'fmt_alert': fmt_alert,
+                       'collector_address': collector_address, 'collector_timeout': collector_timeout,
+                       'max_bytes': max_bytes, 'rotate_interval': rotate_interval, 'backup_count': backup_count,
+                       'compress': compress, 'batch_records': batch_records, 'batch_bytes': batch_bytes,
+                       'batch_ms': batch_ms, 'output_format': output_format,
+                       'traceback_max_frames': traceback_max_frames, 'traceback_max_chars': traceback_max_chars,
+                       'traceback_source_lines': traceback_source_lines,
+                       'flight_recorder_bytes': flight_recorder_bytes,
+                       'flight_recorder_seconds': flight_recorder_seconds}
+    options = {**handler_options, 'rate_limit': rate_limit, 'rate_burst': rate_burst,
+               'rate_summary_interval': rate_summary_interval, 'metrics': metrics,
+               'metrics_file': metrics_file, 'metrics_interval': metrics_interval, 'level': level}
+    destination = None if logfile_path_name is None else os.path.abspath(logfile_path_name)
+    key = (logger_name, destination, tuple(sorted(options.items())))
+    with _configs_lock:
+        previous = _configs.get(logger_name)
+        if previous is not None:
+            if previous.key == key:
+                return previous.logger
+            if _replacing.get(logger_name) is not previous:
+                raise ValueError(
+                    f'logger {logger_name!r} is already configured with different options;'
+                    ' use reconfigure() to change them'
+                )
+            # else reconfigure() is replacing the previous configuration
+
+        # Create logging instance; its level is set below, with the handlers.
+        # See https://docs.python.org/3/howto/logging.html#logging-flow
+        #     https://docs.python.org/3/howto/logging.html#loggers
+        logger = logging.getLogger(logger_name)
+
+        # Create logging handlers and register the configuration.
+        handlers, listener = _build_handlers(logfile_path_name, **handler_options,
+                                             replace_file=previous is not None)
+        if logfile_path_name is not None and (batch_records or batch_bytes or batch_ms):
+            _install_signal_flush()
+        config = _configs[logger_name] = _LoggerConfig(key, logger, handlers, listener)
+
+        # Limit repeated warning/error/critical records before they reach the handlers.
+        if rate_limit:
+            config.filters.append(_RateLimitFilter(logger, rate_limit, rate_burst, rate_summary_interval))
+
+        # Instrument the logger and its handlers (the unwrapped methods run when metrics are off).
+        if previous is not None and previous.metrics is not None:
+            previous.metrics.detach()
+        if metrics or metrics_file is not None:
+            config.metrics = _LoggerMetrics(logger, config.roles(), metrics_file, metrics_interval)
+
+        # Attach the level, handlers and filters. Each list is replaced whole, never changed in place, so a
+        # logging call running meanwhile (which takes no lock here) sees either the previous or the new list.
+        # The fyi/alert handlers still route by level.
+        logger.setLevel(level)
+        previous_handlers = () if previous is None else previous.handlers
+        previous_filters = () if previous is None else previous.filters
+        logger.handlers = [h for h in logger.handlers if h not in previous_handlers] + handlers
+        logger.filters = [f for f in logger.filters if f not in previous_filters] + config.filters
+
+        # Collect only the record fields the formats reference, including the formats of other handlers
+        # the records propagate to. (rate_limit keys records by call site, so it needs the caller lookup
+        # whatever the formats show)
+        config.fields = _format_fields(fmt_fyi) | _format_fields(fmt_alert)
+        if not (config.fields | _propagated_caller_fields(logger)) & _CALLER_FIELDS and not rate_limit:
+            _skip_caller_lookup(logger)
+        else:
+            _restore_caller_lookup(logger)
+        _apply_record_switches()
+
+    # Return logger instance.
+    return logger
+
+
+def reconfigure(logger_name: str, logfile_path_name: str | None = None, grace_period: float = 1.0,
+                **options) -> logging.Logger:
+    """
+    Replace the configuration setup() applied to a logger, atomically and without losing records.
+
+    The new handlers (and filters, level) are built first, then swapped in as whole lists, so logging calls
+    never take a lock for the swap and see either the old or the new configuration. The old handlers are
+    closed (their queue drained, batches written) after grace_period seconds, once calls still holding the
+    old handler list have finished. If the new configuration fails (e.g. a bad option), the old one stays;
+    with unchanged options, nothing is replaced.
+
+    USAGE:
+      - logger = config_log.reconfigure(logger_name, logfile_path_name, mode='async')
+      - logger = config_log.reconfigure(logger_name, logfile_path_name, level='DEBUG')  # during an incident
+
+    INPUT: same as setup(), and
+      - grace_period (float)(optional) = seconds before the old handlers are closed (default 1.0)
+
+    OUTPUT:
+      - logger (logging.Logger) = logger instance
+    """
+    with _configs_lock:
+        previous = _configs.get(logger_name)
+        if previous is None:
+            return setup(logger_name, logfile_path_name, **options)
+        _replacing[logger_name] = previous
+        try:
+            logger = setup(logger_name, logfile_path_name, **options)
+        finally:
+            del _replacing[logger_name]
+        if _configs[logger_name] is not previous:  # else the options were unchanged
+            _retire(previous, grace_period)
+    return logger
+
+
+def _retire(config: _LoggerConfig, grace_period: float) -> None:
+    """
+    Close a replaced configuration after grace_period seconds (at once at teardown()).
+    """
+    def close() -> None:
+        with _configs_lock:
+            if _retiring.pop(id(config), None) is None:
+                return  # teardown() closed it already
+        config.close()
+
+    _retiring[id(config)] = config
+    timer = threading.Timer(grace_period, close)
+    timer.daemon = True
+    timer.start()
+
+
+def teardown(logger_name: str | None = None) -> None:
+    """
+    Flush, detach and close the handlers setup() attached to a logger, and forget its configuration.
+
+    USAGE:
+      - config_log.teardown(logger_name)  # one logger
+      - config_log.teardown()             # every logger configured by setup() (runs at interpreter exit)
+
+    INPUT:
+      - logger_name (str)(optional) = name of logger instance; if omitted, tear down all loggers
+    """
+    with _configs_lock:
+        if logger_name is None:
+            configs = list(_retiring.values()) + list(_configs.values())
+            _retiring.clear()
+            _configs.clear()
+        else:
+            config = _configs.pop(logger_name, None)
+            configs = [] if config is None else [config]
+        for config in configs:
+            config.close()
+            _restore_caller_lookup(config.logger)
+        _apply_record_switches()
+
+
+atexit.register(teardown)
+
+
+def flush(logger_name: str | None = None) -> None:
+    """
+    Write every record logged so far: wait for queued records ('async'/'asyncio' modes) and flush the handlers.
+
+    USAGE:
+      - config_log.flush(logger_name)  # one logger
+      - config_log.flush()             # every logger configured by setup()
+
+    INPUT:
+      - logger_name (str)(optional) = name of logger instance; if omitted, flush all loggers
+    """
+    with _configs_lock:
+        configs = list(_configs.values()) if logger_name is None else [_configs.get(logger_name)]
+    for config in configs:
+        if config is not None:
+            config.flush()
+
+
+async def aflush(logger_name: str | None = None) -> None:
+    """
+    Awaitable flush(): waits on a worker thread (the default executor), so the event loop keeps running.
+
+    USAGE:
+      - await config_log.aflush(logger_name)
+    """
+    import asyncio
+    await asyncio.get_running_loop().run_in_executor(None, flush, logger_name)
+
+
+async def ateardown(logger_name: str | None = None) -> None:
+    """
+    Awaitable teardown(): drains and closes the handlers on a worker thread (the default executor).
+
+    USAGE:
+      - await config_log.ateardown(logger_name)  # e.g. at the end of main()
+    """
+    import asyncio
+    await asyncio.get_running_loop().run_in_executor(None, teardown, logger_name)
+
+
+class ConfigWatcher:
+    """
+    Background thread applying a JSON logging configuration file with reconfigure() whenever it changes.
+
+    PURPOSE: Change levels, filters and destinations of running processes (e.g. DEBUG during an incident)
+             without a restart, which would lose warm caches.
+
+    The file maps logger names to setup() options, e.g.
+        {"app": {"logfile_path_name": "app.log", "level": "DEBUG", "mode": "async"},
+         "app.db": {"level": "WARNING", "rate_limit": 5}}
+    The file is checked every interval seconds (size, modification time and inode), and at once when
+    signum is received. Each logger whose entry changed is reconfigured; loggers left out of the file keep
+    their configuration. A file that cannot be read or applied is reported on stderr and retried when it
+    changes again.
+
+    USAGE:
+      - watcher = config_log.watch_config('logging.json', signum=signal.SIGHUP)
+      - watcher.stop()
+
+    INSTANCE VARIABLES:
+      - path (str) = configuration file
+      - reloads (int) = count of file versions applied
+      - errors (int) = count of file versions that failed to apply
+      - last_error (str | None) = message of the last failure
+    """
+    def __init__(self, path: str, interval: float = 1.0, signum: int | None = None, grace_period: float = 1.0):
+        self.path = path
+        self.interval = interval
+        self.grace_period = grace_period
+        self.reloads = 0
+        self.errors = 0
+        self.last_error = None
+        self._applied = {}  # logger name -> options last applied
+        self._version = None
+        self._wake = threading.Event()
+        self._stopped = False
+        if signum is not None:
+            import signal
+            # The handler only wakes the watcher: reconfiguring inside a signal handler could deadlock on
+            # locks the interrupted (main) thread holds.
+            signal.signal(signum, lambda signum, frame: self._wake.set())
+        self.reload()
+        self._thread = threading.Thread(target=self._run, name='config_log-watcher', daemon=True)
+        self._thread.start()
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Apply the configuration file if it changed since last applied (or if force); return true if applied.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError as error:
+            return self._failed(error)
+        version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if version == self._version and not force:
+            return False
+        self._version = version
+        import json
+        try:
+            with open(self.path, encoding='utf-8') as config_file:
+                loggers = json.load(config_file)
+            if not isinstance(loggers, dict) or not all(isinstance(v, dict) for v in loggers.values()):
+                raise ValueError('expected an object mapping logger names to setup() option objects')
+            for logger_name, options in loggers.items():
+                if self._applied.get(logger_name) == options:
+                    continue
+                options = dict(options)
+                logfile_path_name = options.pop('logfile_path_name', None)
+                reconfigure(logger_name, logfile_path_name, self.grace_period, **options)
+                self._applied[logger_name] = loggers[logger_name]
+        except (OSError, ValueError, TypeError) as error:
+            return self._failed(error)
+        self.reloads += 1
+        return True
+
+    def _failed(self, error: Exception) -> bool:
+        self.errors += 1
+        self.last_error = f'{self.path}: {error}'
+        sys.stderr.write(f'config_log: cannot apply logging configuration {self.last_error}\n')
+        return False
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            if self._stopped:
+                return
+            self._wake.clear()
+            self.reload()
+
+    def stop(self) -> None:
+        """
+        Stop watching the configuration file.
+        """
+        self._stopped = True
+        self._wake.set()
+        self._thread.join()
+
+
+def watch_config(config_file: str, interval: float = 1.0, signum: int | None = None,
+                 grace_period: float = 1.0) -> ConfigWatcher:
+    """
+    Apply a JSON logging configuration file now, and again whenever it changes (see ConfigWatcher).
+
+    USAGE:
+      - watcher = config_log.watch_config('logging.json')                        # poll every second
+      - watcher = config_log.watch_config('logging.json', signum=signal.SIGHUP)  # also reload on SIGHUP
+
+    INPUT:
+      - config_file (str) = JSON file mapping logger names to setup() options (plus logfile_path_name)
+      - interval (float)(optional) = seconds between checks of the file (default 1.0)
+      - signum (int)(optional) = signal that triggers a check at once (default None); install from the
+                                 main thread
+      - grace_period (float)(optional) = seconds before replaced handlers are closed (default 1.0)
+
+    OUTPUT:
+      - watcher (ConfigWatcher) = running watcher; call watcher.stop() to stop it
+    """
+    return ConfigWatcher(config_file, interval, signum, grace_period)
+
+
+def get_metrics(logger_name: str | None = None) -> dict | None:
+    """
+    Return the self-metrics of loggers configured by setup() with metrics=True (or a metrics_file).
+
+    USAGE:
+      - metrics = config_log.get_metrics(logger_name)  # one logger
+      - everything = config_log.get_metrics()          # {logger_name: metrics} of every instrumented logger
+
+    INPUT:
+      - logger_name (str)(optional) = name of logger instance; if omitted, all instrumented loggers
+
+    OUTPUT:
+      - metrics (dict | None) = None when logger_name is not instrumented; otherwise
+          logger, time, uptime_s
+          records (dict)    = records passed to the handlers, by level name
+          suppressed (dict) = records dropped by the logger's filters (e.g. rate_limit), by level name
+          filter_ns (dict)  = histogram of logger filter time
+          handlers (dict)   = by role ('fyi', 'alert', 'queue', 'collector'): handler, emitted and dropped
+                              (by level name), bytes, filter_ns, format_ns, emit_ns, and for 'queue', queue
+                              (depth, max_depth, capacity)
+        Histograms hold count, total_ns, max_ns and buckets ({upper bound in ns: count}, power-of-two bounds).
+    """
+    with _configs_lock:
+        if logger_name is not None:
+            config = _configs.get(logger_name)
+            metrics = None if config is None else config.metrics
+            return None if metrics is None else metrics.snapshot()
+        instrumented = {name: config.metrics for name, config in _configs.items() if config.metrics is not None}
+    return {name: metrics.snapshot() for name, metrics in instrumented.items()}
+
+
+class LazyMessage:
+    """
+    Message argument computed only when a record is formatted (i.e. never for disabled levels).
+
+    USAGE:
+      - logger.debug('cache state: %s', lazy(cache.describe))
+      - logger.debug('rows: %s', lazy(lambda: ', '.join(map(str, rows))))
+
+    Use lazy values as message arguments, not as the message itself, so that record.msg stays a plain
+    template (e.g. for rate limiting). The value is computed once per object, and its str() is returned.
+
+    INPUT:
+      - function (callable) = computes the value
+      - args, kwargs (optional) = arguments of function
+    """
+    __slots__ = ('function', 'args', 'kwargs', '_text')
+
+    def __init__(self, function, *args, **kwargs):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self._text = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = str(self.function(*self.args, **self.kwargs))
+        return self._text
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+def lazy(function, *args, **kwargs) -> LazyMessage:
+    """
+    Return a LazyMessage computing function(*args, **kwargs) only when the record is formatted.
+
+    USAGE:
+      - logger.debug('request: %s', lazy(json.dumps, payload, indent=2))
+    """
+    return LazyMessage(function, *args, **kwargs)
+
+
+class _Context:
+    """
+    Immutable set of bound context fields, rendered once (when bound) rather than for every record.
+
+    Records carry it as record.context: %(context)s shows the text rendering (e.g. '[request_id=r1
+    tenant=acme] ', or '' with nothing bound), 'json' output a JSON object, and 'binary' output its JSON.
+
+    INSTANCE VARIABLES:
+      - fields (dict) = bound field names and values (never changed)
+      - text (str) = text rendering
+    """
+    __slots__ = ('fields', 'text', '_json')
+
+    def __init__(self, fields: dict):
+        self.fields = fields
+        self.text = '[' + ' '.join(f'{name}={value}' for name, value in fields.items()) + '] ' if fields else ''
+        self._json = None
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f'_Context({self.fields!r})'
+
+    def json(self) -> str:
+        """
+        Return the fields as a JSON object (encoded on first use).
+        """
+        if self._json is None:
+            from json.encoder import encode_basestring
+            self._json = '{' + ','.join(encode_basestring(str(name)) + ':' + _json_value(value, encode_basestring)
+                                        for name, value in self.fields.items()) + '}'
+        return self._json
+
+
+# Fields bound to the current thread or asyncio task, attached to each record by _context_record_factory.
+# See https://docs.python.org/3/library/contextvars.html
+_EMPTY_CONTEXT = _Context({})
+_context = contextvars.ContextVar('config_log_context', default=_EMPTY_CONTEXT)
+
+
+def _context_record_factory(base_factory):
+    """
+    Return a LogRecord factory extending base_factory to set record.context to the bound fields.
+
+    A record factory (unlike a logger filter) also tags records propagated from child loggers and records
+    rebuilt by the collector (logging.makeLogRecord), at the cost of one ContextVar lookup per record.
+    """
+    get_context = _context.get
+
+    def record_factory(*args, **kwargs) -> logging.LogRecord:
+        record = base_factory(*args, **kwargs)
+        record.context = get_context()
+        return record
+
+    record_factory.base_factory = base_factory
+    return record_factory
+
+
+# The installed context record factory (see _install_context_factory()), or None.
+_context_factory = None
+
+
+def _install_context_factory(install: bool) -> None:
+    """
+    Install (or, with install false, remove) the context record factory, keeping any other factory.
+
+    Once installed, the factory is never installed twice, even when an application has since installed its
+    own factory on top of it (wrapping it). It is only removed while it is still the outermost factory;
+    otherwise it stays in the chain, harmlessly setting record.context. Records made without it (e.g. when an
+    application replaced the factory outright) are formatted with nothing bound.
+    """
+    global _context_factory
+    if install and _context_factory is None:
+        _context_factory = _context_record_factory(logging.getLogRecordFactory())
+        logging.setLogRecordFactory(_context_factory)
+    elif not install and _context_factory is not None and logging.getLogRecordFactory() is _context_factory:
+        logging.setLogRecordFactory(_context_factory.base_factory)
+        _context_factory = None
+
+
+def bind(**fields) -> contextvars.Token:
+    """
+    Bind fields (e.g. request id, tenant, worker) to the records logged from the current context.
+
+    The fields are added to those already bound, until unbind(token) or the end of the context: each asyncio
+    task runs in a copy of its creator's context, and each thread starts with nothing bound (run a thread's
+    target with contextvars.copy_context().run to pass the fields on). Rendering the fields happens here,
+    once, so logging calls only pick up the bound object.
+
+    USAGE:
+      - token = config_log.bind(request_id=request.id, tenant=request.tenant)
+        try:
+            logger.info('request accepted')  # [request_id=… tenant=…] request accepted
+        finally:
+            config_log.unbind(token)
+
+    INPUT:
+      - fields (keyword arguments) = field names and values (shown with str(), and in JSON as numbers,
+                                     strings, or null)
+
+    OUTPUT:
+      - token (contextvars.Token) = restores the previous fields when passed to unbind()
+    """
+    return _context.set(_Context({**_context.get().fields, **fields}))
+
+
+def unbind(token: contextvars.Token) -> None:
+    """
+    Restore the fields bound before the bind() call that returned token.
+    """
+    _context.reset(token)
+
+
+class _Bound:
+    """
+    Context manager binding fields on entry and restoring the previous ones on exit (see bound()).
+    """
+    __slots__ = ('fields', '_token')
+
+    def __init__(self, fields: dict):
+        self.fields = fields
+        self._token = None
+
+    def __enter__(self) -> dict:
+        self._token = bind(**self.fields)
+        return get_context()
+
+    def __exit__(self, *exc_info) -> None:
+        unbind(self._token)
+
+
+def bound(**fields) -> _Bound:
+    """
+    Return a context manager binding fields for the duration of a with block.
+
+    USAGE:
+      - with config_log.bound(request_id=request.id, worker=os.getpid()):
+            await handle(request)  # records logged here and in tasks it creates carry the fields
+    """
+    return _Bound(fields)
+
+
+def get_context() -> dict:
+    """
+    Return a copy of the fields bound to the current context.
+    """
+    return dict(_context.get().fields)
+
+
+# Collector counters, in the order stored in the collector's shared counter array.
+_COLLECTOR_COUNTERS = ('received', 'malformed', 'truncated', 'connections', 'batches')
+
+
+def _collector_address(logfile_path_name: str | None, collector_address: str | None = None) -> str:
+    """
+    Return the collector socket path: collector_address, or logfile_path_name + '.sock'.
+    """
+    if collector_address is not None:
+        return collector_address
+    return os.path.abspath(logfile_path_name) + '.sock'
+
+
+class Collector:
+    """
+    Handle of a collector process that owns a log file and writes the records shipped by worker processes.
+
+    USAGE:
+      - collector = config_log.start_collector(logfile_path_name)
+      - collector.stats()  # e.g. {'received': 1200, 'malformed': 0, 'truncated': 0, ...}
+      - collector.stop()   # also runs at interpreter exit
+
+    INSTANCE VARIABLES:
+      - address (str) = path of the collector's Unix domain socket
+      - process (multiprocessing.Process) = collector process
+    """
+    def __init__(self, process, address: str, stop_event, counters):
+        self.process = process
+        self.address = address
+        self._stop_event = stop_event
+        self._counters = counters
+
+    def stats(self) -> dict:
+        """
+        Return the collector's counters:
+          - received = records written to the log file
+          - malformed = records that could not be decoded (lost)
+          - truncated = partial records cut off by a worker disconnect (lost)
+          - connections = worker connections accepted
+          - batches = batched writes (one flush per batch) to the log file
+        """
+        return dict(zip(_COLLECTOR_COUNTERS, self._counters[:]))
+
+    def stop(self, timeout: float | None = None) -> None:
+        """
+        Stop the collector after it drains pending records, and wait for it to exit.
+        """
+        self._stop_event.set()
+        self.process.join(timeout)
+
+
+def start_collector(logfile_path_name: str, collector_address: str | None = None,
+                    fmt_fyi: str = FMT_FYI, fmt_alert: str = FMT_ALERT,
+                    start_timeout: float = 10.0, **file_options) -> Collector:
+    """
+    Start a collector process that owns logfile_path_name and writes records from 'multiprocess' loggers.
+
+    PURPOSE: Log safely from many processes (e.g. a pre-fork pool) to one file: only the collector opens
+             the file, so records are never torn or interleaved, and it writes them in batches.
+
+    USAGE:
+        collector = config_log.start_collector(logfile_path_name)  # in the parent, before starting workers
+        [ … in each worker … ]
+        logger = config_log.setup(logger_name, logfile_path_name, mode='multiprocess')
+
+    INPUT:
+      - logfile_path_name (str) = path and name of log file
+      - collector_address (str)(optional) = Unix domain socket path (default logfile_path_name + '.sock')
+      - fmt_fyi, fmt_alert (str)(optional) = record formats, as for setup()
+      - start_timeout (float)(optional) = seconds to wait for the collector to listen (default 10)
+      - file_options (optional) = log file options, as for setup(): max_bytes, rotate_interval, backup_count,
+                                  compress, batch_records, batch_bytes, batch_ms, output_format,
+                                  traceback_max_frames, traceback_max_chars, traceback_source_lines,
+                                  flight_recorder_bytes, flight_recorder_seconds
+
+    OUTPUT:
+      - collector (Collector) = collector handle; stop() runs at interpreter exit
+
+    REFERENCES:
+      - multiprocessing -- See https://docs.python.org/3/library/multiprocessing.html
+      - socket -- See https://docs.python.org/3/library/socket.html
+    """
+    import multiprocessing
+
+    address = _collector_address(logfile_path_name, collector_address)
+    ready_event = multiprocessing.Event()
+    stop_event = multiprocessing.Event()
+    counters = multiprocessing.Array('Q', len(_COLLECTOR_COUNTERS), lock=False)
+    process = multiprocessing.Process(
+        target=_run_collector, name='config_log-collector',
+        args=(logfile_path_name, address, fmt_fyi, fmt_alert, ready_event, stop_event, counters),
+        kwargs=file_options
+    )
+    process.start()
+    if not ready_event.wait(start_timeout):
+        process.terminate()
+        raise RuntimeError(f'collector for {logfile_path_name!r} did not start listening on {address!r}')
+    collector = Collector(process, address, stop_event, counters)
+    atexit.register(collector.stop)
+    return collector
+
+
+def _run_collector(logfile_path_name: str, address: str, fmt_fyi: str, fmt_alert: str,
+                   ready_event, stop_event, counters, drain_timeout: float = 5.0, **file_options) -> None:
+    """
+    Collector process: accept worker connections, decode records, and write them with the fyi/alert
+    handler pair, flushing once per batch (all records read in one selector pass).
+    """
+    import json
+    import selectors
+    import socket
+
+    received, malformed, truncated, connections, batches = range(len(_COLLECTOR_COUNTERS))
+    handlers, _ = _build_handlers(logfile_path_name, 'sync', 0, 'block', fmt_fyi, fmt_alert, **file_options)
+    shared_file = handlers[1].shared  # the alert handler's (the fyi handler may write a flight recorder)
+    shared_file.autoflush = False
+
+    # Listen on a socket only the owning user can connect to.
+    if os.path.exists(address):
+        os.unlink(address)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(address)
+    finally:
+        os.umask(umask)
+    server.listen(128)
+    server.setblocking(False)
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    buffers = {}
+    ready_event.set()
+
+    drain_deadline = None
+    try:
+        while True:
+            events = selector.select(timeout=0.1)
+            if stop_event.is_set():
+                if drain_deadline is None:
+                    drain_deadline = time.monotonic() + drain_timeout
+                if not events or time.monotonic() > drain_deadline:
+                    break
+            for key, _ in events:
+                if key.fileobj is server:
+                    conn, _ = server.accept()
+                    conn.setblocking(False)
+                    selector.register(conn, selectors.EVENT_READ)
+                    buffers[conn] = bytearray()
+                    counters[connections] += 1
+                    continue
+                conn = key.fileobj
+                try:
+                    data = conn.recv(262144)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b''
+                buffer = buffers[conn]
+                if not data:  # worker disconnected
+                    if buffer:
+                        counters[truncated] += 1
+                    selector.unregister(conn)
+                    conn.close()
+                    del buffers[conn]
+                    continue
+                buffer += data
+                offset = 0
+                while len(buffer) - offset >= 4:
+                    (size,) = struct.unpack_from('>L', buffer, offset)
+                    if len(buffer) - offset - 4 < size:
+                        break
+                    payload = bytes(buffer[offset + 4:offset + 4 + size])
+                    offset += 4 + size
+                    try:
+                        record = logging.makeLogRecord(json.loads(payload))
+                    except (ValueError, TypeError):
+                        counters[malformed] += 1
+                        continue
+                    context = getattr(record, 'context', None)  # the worker's bound fields
+                    record.context = _Context(context) if type(context) is dict else _EMPTY_CONTEXT
+                    for handler in handlers:
+                        if record.levelno >= handler.level:
+                            handler.handle(record)
+                    counters[received] += 1
+                del buffer[:offset]
+            if events:
+                shared_file.flush()
+                counters[batches] += 1
+    finally:
+        for conn in buffers:
+            conn.close()
+        selector.close()
+        server.close()
+        if os.path.exists(address):
+            os.unlink(address)
+        for handler in handlers:
+            handler.close()
+
+
+def _open_log(logfile_path_name: str):
+    """
+    Open a log file, or a rotated segment compressed with gzip ('.gz') or zstd ('.zst'), for binary reading.
+    """
+    if logfile_path_name.endswith('.gz'):
+        import gzip
+        return gzip.open(logfile_path_name, 'rb')
+    if logfile_path_name.endswith('.zst'):
+        try:
+            from compression import zstd  # Python 3.14+
+            return zstd.open(logfile_path_name, 'rb')
+        except ImportError:
+            import zstandard
+            return zstandard.open(logfile_path_name, 'rb')
+    return open(logfile_path_name, 'rb')
+
+
+def _decode_binary(body: bytes) -> dict:
+    """
+    Return the fields of one binary record body (see BINARY_FIELDS) as a dict.
+    """
+    record = {}
+    offset = 0
+    while offset < len(body):
+        name = BINARY_FIELDS[body[offset]]
+        (size,) = _length.unpack_from(body, offset + 1)
+        value = body[offset + 5:offset + 5 + size].decode('utf-8')
+        offset += 5 + size
+        try:
+            if name in _BINARY_INT_FIELDS:
+                value = int(value)
+            elif name in _BINARY_FLOAT_FIELDS:
+                value = float(value)
+            elif name in _BINARY_JSON_FIELDS:
+                import json
+                value = json.loads(value)
+        except ValueError:
+            pass
+        record[name] = value
+    return record
+
+
+def read_records(logfile_path_name: str) -> Iterator[dict]:
+    """
+    Stream-decode the records of a log file written with output_format 'json' or 'binary'.
+
+    PURPOSE: Read large structured log files (or their rotated '.gz'/'.zst' segments) one record at a time,
+             in constant memory, without parsing the human-readable text layout.
+
+    USAGE:
+      - for record in config_log.read_records(logfile_path_name):
+            print(record['asctime'], record['levelname'], record['message'])
+
+    INPUT:
+      - logfile_path_name (str) = path and name of log file (format detected from its first byte)
+
+    OUTPUT:
+      - records (Iterator[dict]) = one dict of fields per record; a final record cut short (e.g. by a
+                                   crash while writing) is skipped
+
+    Raises ValueError when a binary record does not start with BINARY_MARKER (corrupt file).
+    """
+    import json
+
+    with _open_log(logfile_path_name) as stream:
+        first = stream.read(1)
+        if first and first[0] == BINARY_MARKER:
+            header = first + stream.read(4)
+            offset = 0
+            while len(header) == _binary_header.size:
+                marker, size = _binary_header.unpack(header)
+                if marker != BINARY_MARKER:
+                    raise ValueError(f'corrupt binary log record at byte {offset} of {logfile_path_name!r}')
+                body = stream.read(size)
+                if len(body) < size:
+                    return
+                yield _decode_binary(body)
+                offset += _binary_header.size + size
+                header = stream.read(_binary_header.size)
+            return
+        for line in itertools.chain([first + stream.readline()], stream):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                if line.endswith(b'}'):
+                    raise
+                return  # final line cut short
+
+
+# Text layout (FMT_FYI/FMT_ALERT with DATEFMT) parsing: every record is written as '\n' + body + '\n', so a
+# record starts at a newline beginning a blank line and followed by an fyi timestamp or the alert '-----'.
+_TEXT_TIMESTAMP = rb'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d [+-]\d{4}'
+_TEXT_RECORD_START = re.compile(rb'(?<![^\n])\n(?=-----\n|' + _TEXT_TIMESTAMP + rb' - )')
+_TEXT_FYI_HEAD = re.compile(rb'\n(' + _TEXT_TIMESTAMP + rb') - (.*?) - ([A-Z]+|Level \d+): ')
+_TEXT_ALERT_HEAD = re.compile(rb'^(' + _TEXT_TIMESTAMP + rb') - (.*) - ([A-Z]+|Level \d+) $', re.MULTILINE)
+
+
+# Epoch seconds of recently parsed DATEFMT timestamps (many records share a second).
+_timestamp_cache: dict[bytes, float] = {}
+
+
+def _parse_timestamp(text: bytes) -> float:
+    """
+    Return the epoch seconds of a DATEFMT timestamp (cached).
+    """
+    created = _timestamp_cache.get(text)
+    if created is None:
+        import datetime
+        if len(_timestamp_cache) > 4096:
+            _timestamp_cache.clear()
+        created = _timestamp_cache[text] = datetime.datetime.strptime(text.decode('ascii'), DATEFMT).timestamp()
+    return created
+
+
+def _level_number(levelname: bytes) -> int:
+    """
+    Return the level number of a level name (e.g. b'WARNING' -> 30, b'Level 5' -> 5).
+    """
+    name = levelname.decode('ascii')
+    if name.startswith('Level '):
+        return int(name[6:])
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else 0
+
+
+def _text_records(buffer, start: int = 0, end: int | None = None) -> Iterator[tuple]:
+    """
+    Yield (offset, length, created, levelno, name) for each text layout record in buffer[start:end].
+
+    The last record found is assumed to end at end; callers reading a growing file treat it as possibly
+    incomplete. Records are found one at a time, so memory does not grow with the buffer.
+    """
+    end = len(buffer) if end is None else end
+    created, levelno, name = 0.0, 0, b''
+    offset = None
+    for record_end in itertools.chain((match.start() for match in _TEXT_RECORD_START.finditer(buffer, start, end)),
+                                      (end,)):
+        if offset is not None:
+            if buffer[offset + 1:offset + 6] == b'-----':
+                head = _TEXT_ALERT_HEAD.search(buffer, offset, record_end)
+            else:
+                head = _TEXT_FYI_HEAD.match(buffer, offset, record_end)
+            if head is not None:  # else a record without head keeps the previous record's fields
+                created = _parse_timestamp(head.group(1))
+                name = head.group(2)
+                levelno = _level_number(head.group(3))
+            yield offset, record_end - offset, created, levelno, name
+        offset = record_end
+
+
+def _name_hash(name: bytes) -> int:
+    """
+    Return the 32-bit hash of a logger name stored in the index (zlib.crc32, stable across processes).
+    """
+    return zlib.crc32(name)
+
+
+class _LogIndex:
+    """
+    Sidecar index (logfile_path_name + '.idx') of a text layout log file's records, for query().
+
+    LAYOUT: a header ('<8sQQQ': magic, log file inode, indexed bytes, entry count) followed by one fixed-size
+    entry per record in file order ('<QdIBI': offset, created, length, levelno, logger name hash). The last
+    record of the file is never indexed (it may still be growing); query() parses it directly.
+
+    USAGE:
+      - index = _LogIndex(logfile_path_name)
+      - index.update(buffer)  # index records appended since the last update (rebuild if the file was replaced)
+    """
+    MAGIC = b'CLIDX\x00\x00\x01'
+    HEADER = struct.Struct('<8sQQQ')
+    ENTRY = struct.Struct('<QdIBI')
+
+    def __init__(self, logfile_path_name: str):
+        self.path = logfile_path_name + '.idx'
+        self.inode = os.stat(logfile_path_name).st_ino
+        self.indexed_bytes = 0
+        self.count = 0
+        try:
+            with open(self.path, 'rb') as stream:
+                magic, inode, indexed_bytes, count = self.HEADER.unpack(stream.read(self.HEADER.size))
+            if magic == self.MAGIC and inode == self.inode:
+                self.indexed_bytes, self.count = indexed_bytes, count
+        except (OSError, struct.error):
+            pass
+
+    def update(self, buffer) -> None:
+        """
+        Index complete records of buffer (the log file's contents) after indexed_bytes.
+
+        Entries are written as records are found, holding back only the last one (possibly incomplete),
+        so memory stays constant however large the file. When the index file cannot be written (e.g. a
+        reader without write permission in the log file's directory), the entries already in it are kept,
+        and query() parses the records after them directly.
+        """
+        if self.indexed_bytes > len(buffer):  # truncated: rebuild
+            self.indexed_bytes, self.count = 0, 0
+        kept = (self.indexed_bytes, self.count)
+        pack = self.ENTRY.pack
+        stream = None
+        previous = None
+        try:
+            try:
+                for record in _text_records(buffer, self.indexed_bytes):
+                    if previous is not None:
+                        if stream is None:
+                            stream = self._open_entries()
+                        offset, length, created, levelno, name = previous
+                        stream.write(pack(offset, created, length, levelno, _name_hash(name)))
+                        self.indexed_bytes = offset + length
+                        self.count += 1
+                    previous = record
+                if stream is None and not os.path.exists(self.path):
+                    stream = self._open_entries()
+            finally:
+                if stream is not None:
+                    with stream:
+                        stream.truncate()
+                        stream.seek(0)
+                        stream.write(self.HEADER.pack(self.MAGIC, self.inode, self.indexed_bytes, self.count))
+        except OSError:
+            self.indexed_bytes, self.count = kept
+
+    def _open_entries(self):
+        """
+        Open the index file positioned after its count entries.
+        """
+        stream = open(self.path, 'r+b' if os.path.exists(self.path) else 'w+b')
+        stream.seek(self.HEADER.size + self.count * self.ENTRY.size)
+        return stream
+
+    def entries(self, since: float | None = None, until: float | None = None) -> Iterator[tuple]:
+        """
+        Yield (offset, created, length, levelno, name_hash) of indexed records with since <= created < until,
+        binary searching the (time-ordered) index for the range.
+        """
+        import bisect
+        import mmap
+
+        if not self.count:
+            return
+        with open(self.path, 'rb') as stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            size, unpack = self.ENTRY.size, self.ENTRY.unpack_from
+            base = self.HEADER.size
+
+            class Times:  # created times, as a sequence for bisect
+                def __len__(_):
+                    return self.count
+
+                def __getitem__(_, i):
+                    return unpack(view, base + i * size)[1]
+
+            low = 0 if since is None else bisect.bisect_left(Times(), since)
+            high = self.count if until is None else bisect.bisect_left(Times(), until, low)
+            for i in range(low, high):
+                yield unpack(view, base + i * size)
+
+
+def _record_name(text: bytes) -> bytes | None:
+    """
+    Return the logger name in one text layout record.
+    """
+    head = _TEXT_ALERT_HEAD.search(text) if text.startswith(b'\n-----') else _TEXT_FYI_HEAD.match(text)
+    return None if head is None else head.group(2)
+
+
+def _parse_time(value: str | float | None) -> float | None:
+    """
+    Return epoch seconds for a query time: a number, or ISO text (local time unless it has an offset).
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        import datetime
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def query(logfile_path_name: str, since: str | float | None = None, until: str | float | None = None,
+          level: str | int | None = None, logger_name: str | None = None) -> Iterator[str]:
+    """
+    Stream records matching a time range, minimum level and/or logger name from a text layout log file.
+
+    PURPOSE: Search large log files written with the fmt_fyi/fmt_alert layout without reading them whole:
+             the file is memory-mapped, and a sidecar index (logfile_path_name + '.idx', extended
+             incrementally) locates the time range by binary search, so work follows the matching records.
+
+    USAGE:
+      - for text in config_log.query('execution.log', since='2024-05-01 13:00', level='ERROR'):
+            print(text, end='')
+      - At command line: py config_log.py query execution.log --since '2024-05-01 13:00' --level ERROR
+
+    INPUT:
+      - logfile_path_name (str) = path and name of log file (default FMT_FYI/FMT_ALERT/DATEFMT layout)
+      - since (str | float)(optional) = earliest record time: epoch seconds or ISO text (local time unless
+                                        it has a UTC offset)
+      - until (str | float)(optional) = latest record time (exclusive), as for since
+      - level (str | int)(optional) = minimum level (e.g. 'WARNING' or 30)
+      - logger_name (str)(optional) = logger name (exact match)
+
+    OUTPUT:
+      - records (Iterator[str]) = matching records' text, exactly as in the file
+
+    NOTES:
+      - The time range is found by binary search, which assumes records are (roughly) time ordered, as
+        written by one process or the 'multiprocess' collector.
+      - A reader who cannot write the sidecar index (e.g. in /var/log) still gets every matching record:
+        the index is used as found, and the records it does not cover are parsed directly.
+    """
+    import mmap
+
+    since, until = _parse_time(since), _parse_time(until)
+    if isinstance(level, str):
+        level = _level_number(level.upper().encode('ascii'))
+    name = None if logger_name is None else logger_name.encode('utf-8')
+    name_hash = None if name is None else _name_hash(name)
+    if not os.path.getsize(logfile_path_name):
+        return
+    with open(logfile_path_name, 'rb') as stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        index = _LogIndex(logfile_path_name)
+        index.update(buffer)
+
+        for offset, created, length, levelno, record_hash in index.entries(since, until):
+            if (level is None or levelno >= level) and (name_hash is None or record_hash == name_hash):
+                text = buffer[offset:offset + length]
+                if name is None or _record_name(text) == name:  # hash collisions
+                    yield text.decode('utf-8', errors='replace')
+        for offset, length, created, levelno, record_name in _text_records(buffer, index.indexed_bytes):
+            if ((since is None or created >= since) and (until is None or created < until)
+                    and (level is None or levelno >= level) and (name is None or record_name == name)):
+                yield buffer[offset:offset + length].decode('utf-8', errors='replace')
+
+
+# Compaction run file entry ('<dIIIII16sI': created, input file number, record number, levelno, alert head
+# line start and end in the text, alert block digest, text length), followed by the record text. Runs are
+# sorted by (created, input file number, record number).
+_run_entry = struct.Struct('<dIIIII16sI')
+_SIDECAR_SUFFIXES = ('.idx', '.ring', '.sock', '.tmp')
+_TEXT_EXCEPTION = re.compile(rb'^Traceback \(most recent call last\):\n(?:[ \t].*\n)*([A-Za-z_][\w.]*)(?=:|\s*$)',
+                             re.MULTILINE)
+
+
+def _compact_file(task: tuple) -> tuple[str, dict]:
+    """
+    Compaction worker: parse one text layout log file into a time-sorted run file.
+
+    INPUT:
+      - task (tuple) = (input file number, log file path and name, run file path and name)
+
+    OUTPUT:
+      - (run file path and name, counts) with counts = {'records': n, 'levels': {…}, 'loggers': {…},
+        'exceptions': {…}}
+    """
+    import hashlib
+    import mmap
+    import shutil
+    import tempfile
+
+    file_number, logfile_path_name, run_path_name = task
+    counts = {'records': 0, 'levels': {}, 'loggers': {}, 'exceptions': {}}
+    levels, loggers, exceptions = counts['levels'], counts['loggers'], counts['exceptions']
+    decompressed = None
+    if logfile_path_name.endswith(tuple(COMPRESSIONS.values())):  # rotated segment: memory-map a plain copy
+        decompressed = tempfile.NamedTemporaryFile(dir=os.path.dirname(run_path_name), delete=False)
+        with decompressed, _open_log(logfile_path_name) as source:
+            shutil.copyfileobj(source, decompressed, 1024 * 1024)
+        logfile_path_name = decompressed.name
+    try:
+        with open(run_path_name, 'wb') as run:
+            if not os.path.getsize(logfile_path_name):
+                return run_path_name, counts
+            with open(logfile_path_name, 'rb') as stream, \
+                    mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                # Records of one file are nearly time ordered: sorting (stably) is close to linear.
+                records = [(created, number, offset, length, levelno, name)
+                           for number, (offset, length, created, levelno, name) in enumerate(_text_records(buffer))]
+                records.sort(key=lambda record: record[0])
+                pack = _run_entry.pack
+                for created, number, offset, length, levelno, name in records:
+                    text = buffer[offset:offset + length]
+                    if not text.endswith(b'\n'):  # last record of a file cut short
+                        text += b'\n'
+                    head_start = head_end = 0
+                    digest = b''
+                    if text.startswith(b'\n-----\n'):
+                        head = _TEXT_ALERT_HEAD.search(text)
+                        if head is not None:
+                            head_start, head_end = head.span()
+                            digest = hashlib.blake2b(text[:head_start] + text[head_end:], digest_size=16).digest()
+                        exception = None
+                        for exception in _TEXT_EXCEPTION.finditer(text):  # the last is the one raised
+                            pass
+                        if exception is not None:
+                            exception = exception.group(1).decode('utf-8', errors='replace')
+                            exceptions[exception] = exceptions.get(exception, 0) + 1
+                    run.write(pack(created, file_number, number, levelno, head_start, head_end, digest, len(text)))
+                    run.write(text)
+                    levelname = logging.getLevelName(levelno)
+                    levels[levelname] = levels.get(levelname, 0) + 1
+                    logger_name = name.decode('utf-8', errors='replace')
+                    loggers[logger_name] = loggers.get(logger_name, 0) + 1
+                counts['records'] = len(records)
+    finally:
+        if decompressed is not None:
+            os.unlink(decompressed.name)
+    return run_path_name, counts
+
+
+def _run_entries(run_path_name: str) -> Iterator[tuple]:
+    """
+    Yield (created, input file number, record number, levelno, head_start, head_end, digest, text) for each
+    entry of a compaction run file, in order.
+    """
+    size, unpack = _run_entry.size, _run_entry.unpack
+    with open(run_path_name, 'rb', buffering=1024 * 1024) as run:
+        while True:
+            header = run.read(size)
+            if len(header) < size:
+                return
+            *fields, length = unpack(header)
+            yield (*fields, run.read(length))
+
+
+def _merge_runs(task: tuple) -> str:
+    """
+    Compaction worker: merge sorted run files into one sorted run file, then delete them.
+
+    INPUT:
+      - task (tuple) = (run file paths and names, merged run file path and name)
+    """
+    import heapq
+
+    run_path_names, merged_path_name = task
+    pack = _run_entry.pack
+    with open(merged_path_name, 'wb', buffering=1024 * 1024) as merged:
+        for *fields, text in heapq.merge(*map(_run_entries, run_path_names)):
+            merged.write(pack(*fields, len(text)))
+            merged.write(text)
+    for run_path_name in run_path_names:
+        os.unlink(run_path_name)
+    return merged_path_name
+
+
+def _log_files(paths: list[str]) -> list[str]:
+    """
+    Return the log files named by paths, with each directory expanded to the files in it (recursively),
+    except sidecar files (index, flight recorder ring, collector socket, temporary files).
+    """
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for directory, subdirectories, names in os.walk(path):
+            subdirectories.sort()
+            files.extend(os.path.join(directory, name) for name in sorted(names)
+                         if not name.endswith(_SIDECAR_SUFFIXES))
+    return files
+
+
+def compact(logfile_path_names: list[str], output_path_name: str, compress: str = 'gzip',
+            workers: int | None = None, fan_in: int = 64, dedup_size: int = 4096) -> dict:
+    """
+    Merge many text layout log files into one compressed, time-ordered file, and summarize them.
+
+    PURPOSE: Combine the per-process log files of a fleet (fmt_fyi/fmt_alert layout, plain or rotated
+             '.gz'/'.zst' segments) for analysis, using every CPU and bounded memory.
+
+    Each input file is parsed by a process pool into a time-sorted run file (in a temporary directory next
+    to the output). Runs are k-way merged by record time (heapq.merge), at most fan_in at a time: with more
+    runs, groups of fan_in are first merged in parallel into larger runs. The final merge writes the output
+    and replaces each repeat of an alert block seen recently (same text apart from its timestamp line;
+    up to dedup_size distinct blocks remembered) with a short alert record pointing at the first one.
+    Memory stays bounded by fan_in, dedup_size and the largest single input file's record count, whatever
+    the number of input files.
+
+    USAGE:
+      - summary = config_log.compact(glob.glob('logs/*.log*'), 'fleet.log.gz')
+      - At command line: py config_log.py compact logs/ --output fleet.log.gz
+
+    INPUT:
+      - logfile_path_names (list) = paths and names of log files; directories are expanded to the files in
+                                    them, except index/ring/socket sidecar files
+      - output_path_name (str) = path and name of the merged, compressed log file
+      - compress (str)(optional) = output compression: 'gzip' (default) or 'zstd'
+      - workers (int)(optional) = worker processes (default os.cpu_count())
+      - fan_in (int)(optional) = most run files merged (and open) at once (default 64, at least 2)
+      - dedup_size (int)(optional) = distinct alert blocks remembered for deduplication (default 4096,
+                                     0 keeps every repeat)
+
+    OUTPUT:
+      - summary (dict) = files, records (all records, repeats included), duplicates (repeated alert blocks
+                         shortened), record counts by levels, loggers and exceptions (type of the exception
+                         raised, for alert records with a traceback), and output
+
+    NOTES:
+      - Record times have one-second resolution (DATEFMT); records of the same second keep their input
+        file order, and files are taken in the order given (directories sorted by name).
+    """
+    import multiprocessing
+    import shutil
+    import tempfile
+
+    if compress not in COMPRESSIONS:
+        raise ValueError(f'compress must be one of {tuple(COMPRESSIONS)}, not {compress!r}')
+    if fan_in < 2:
+        raise ValueError('fan_in must be at least 2')
+    files = _log_files(logfile_path_names)
+    summary = {'files': len(files), 'records': 0, 'duplicates': 0, 'levels': {}, 'loggers': {}, 'exceptions': {}}
+    run_directory = tempfile.mkdtemp(prefix='.compact_', dir=os.path.dirname(os.path.abspath(output_path_name)))
+    try:
+        with multiprocessing.get_context().Pool(workers) as pool:
+            # Parse the input files into sorted runs, adding up their counts as they finish.
+            tasks = [(number, path, os.path.join(run_directory, f'{number}.run'))
+                     for number, path in enumerate(files)]
+            runs = []
+            for run_path_name, counts in pool.imap_unordered(_compact_file, tasks):
+                runs.append(run_path_name)
+                summary['records'] += counts['records']
+                for field in ('levels', 'loggers', 'exceptions'):
+                    totals = summary[field]
+                    for name, count in counts[field].items():
+                        totals[name] = totals.get(name, 0) + count
+
+            # Merge groups of fan_in runs in parallel until one final merge of at most fan_in runs is left.
+            merge_pass = 0
+            while len(runs) > fan_in:
+                groups = [runs[i:i + fan_in] for i in range(0, len(runs), fan_in)]
+                tasks = [(group, os.path.join(run_directory, f'{merge_pass}.{n}.merged'))
+                         for n, group in enumerate(groups)]
+                runs = pool.map(_merge_runs, tasks, chunksize=1)
+                merge_pass += 1
+
+        # Final merge into the output, shortening repeated alert blocks.
+        import heapq
+        seen = {}  # digest -> first record's timestamp, least recently seen first
+        pending, pending_bytes = [], 0
+        with _open_compressed(output_path_name + '.tmp', compress) as output:
+            for created, _, _, _, head_start, head_end, digest, text in heapq.merge(*map(_run_entries, runs)):
+                if head_end and dedup_size:
+                    head_line = text[head_start:head_end]
+                    first = seen.pop(digest, None)
+                    if first is None:
+                        first = head_line.split(b' - ', 1)[0]
+                        if len(seen) >= dedup_size:
+                            del seen[next(iter(seen))]
+                    else:
+                        text = b''.join((b'\n-----\n[repeat of the alert block first written ', first, b'] \n',
+                                         head_line, b'\n'))
+                        summary['duplicates'] += 1
+                    seen[digest] = first
+                pending.append(text)
+                pending_bytes += len(text)
+                if pending_bytes >= 1024 * 1024:  # one compressor call per megabyte
+                    output.write(b''.join(pending))
+                    pending, pending_bytes = [], 0
+            output.write(b''.join(pending))
+        os.replace(output_path_name + '.tmp', output_path_name)
+    finally:
+        shutil.rmtree(run_directory, ignore_errors=True)
+    summary['output'] = output_path_name
+    return summary
+
+
+# Usage example
+if __name__ == '__main__':
+    # Configure command line interface arguments plus help and usage messages
+    args = get_cli_help()
+    
+    # Run a subcommand instead of the logging test, when given
+    if args.command == 'query':
+        for text in query(args.query_logfile, args.since, args.until, args.level, args.logger_name):
+            sys.stdout.write(text)
+        sys.exit(0)
+    if args.command == 'recover':
+        for data in read_flight_recorder(args.ring_file, args.since):
+            sys.stdout.buffer.write(data)
+        sys.exit(0)
+    if args.command == 'compact':
+        import json
+        summary = compact(args.compact_logfiles, args.output, args.compress, args.workers, args.fan_in,
+                          args.dedup_size)
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+        sys.exit(0)
 
-# Usage example
-if __name__ == '__main__':
-    # Configure command line interface arguments plus help and usage messages
-    args = get_cli_help()
-    
     # Configure logging per command line options
     if args.logfile_path_name == None:
-        logger = setup(__name__)
+        logger = setup(__name__, mode=args.mode)
     else:
-        logger = setup(__name__, args.logfile_path_name)
+        if args.mode == 'multiprocess':  # this process also runs the collector
+            collector = start_collector(args.logfile_path_name)
+        logger = setup(__name__, args.logfile_path_name, mode=args.mode)
 
     try: # Code to execute, at least until an exception occurs
         print('\n\n----- STARTING EXECUTION -----\nOne moment please…')
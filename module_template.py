@@ -21,8 +21,6 @@ REFERENCES:
 
 
 import logging
-import argparse
-from config_log import setup
 
 
 def get_cli_help():
@@ -42,6 +40,8 @@ def get_cli_help():
     REFERENCES:
   - argparse -- See https://docs.python.org/3/library/argparse.html
     """
+    import argparse
+
     # Create argument parser instance with module information.
     parser = argparse.ArgumentParser(
         prog='module_template',
@@ -91,7 +91,8 @@ if __name__ == '__main__':
     # Configure command line interface arguments plus help and usage messages
     args = get_cli_help()
     
-    # Configure logging per command line options
+    # Configure logging per command line options (config_log is loaded only when run as a script)
+    from config_log import setup
     if args.logfile_path_name == None:
         logger = setup(__name__)
     else:
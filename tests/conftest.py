@@ -0,0 +1,39 @@
+"""
+conftest.py: Shared pytest fixtures for the config_log tests.
+
+Makes the repository root importable (config_log is a top-level module, not an installed package) and
+removes every setup() configuration after each test, so tests never share loggers, files or record factories.
+"""
+
+
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config_log
+
+
+@pytest.fixture(autouse=True)
+def clean_config_log():
+    """
+    Tear down all setup() configurations (and restore the logging record switches) after each test.
+    """
+    switches = (logging.logThreads, logging.logProcesses, logging.logMultiprocessing)
+    factory = logging.getLogRecordFactory()
+    yield
+    config_log.teardown()
+    logging.logThreads, logging.logProcesses, logging.logMultiprocessing = switches
+    logging.setLogRecordFactory(factory)
+    config_log._context_factory = None
+
+
+def read(path) -> str:
+    """
+    Return the text of a log file.
+    """
+    with open(path, encoding='utf-8') as stream:
+        return stream.read()
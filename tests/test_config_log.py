@@ -0,0 +1,598 @@
+"""
+test_config_log.py: Behavior tests of config_log, one or more per feature.
+
+USAGE:
+  - py -m pytest -q tests
+"""
+
+
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import config_log
+from conftest import read
+
+
+# Shared log file
+
+def test_loggers_sharing_a_file_survive_teardown_of_one(tmp_path):
+    path = tmp_path / 'shared.log'
+    config_log.setup('test.shared.a', str(path))
+    logger_b = config_log.setup('test.shared.b', str(path))
+    config_log.teardown('test.shared.a')
+    logger_b.info('still open')
+    logger_b.warning('still open too')
+    config_log.teardown('test.shared.b')
+    text = read(path)
+    assert 'test.shared.b - INFO: still open' in text
+    assert 'still open too' in text
+
+
+def test_fyi_alert_pair_keeps_records_in_order(tmp_path):
+    path = tmp_path / 'order.log'
+    logger = config_log.setup('test.order', str(path))
+    for i in range(20):
+        (logger.info if i % 2 else logger.error)('record %d', i)
+    config_log.teardown('test.order')
+    text = read(path)
+    positions = [text.index(f'record {i} ') if i % 2 == 0 else text.index(f'record {i}\n') for i in range(20)]
+    assert positions == sorted(positions)
+
+
+# Live reconfiguration
+
+def test_reconfigure_file_logger_keeps_writing_after_grace_period(tmp_path):
+    path = tmp_path / 'reconfigure.log'
+    logger = config_log.setup('test.reconfigure', str(path), level='INFO')
+    logger.debug('hidden')
+    config_log.reconfigure('test.reconfigure', str(path), level='DEBUG', grace_period=0.05)
+    logger.debug('during grace')
+    time.sleep(0.2)  # the replaced configuration is closed by now
+    logger.debug('after grace')
+    logger.error('alert after grace')
+    config_log.teardown('test.reconfigure')
+    text = read(path)
+    assert 'hidden' not in text
+    assert 'during grace' in text and 'after grace' in text and 'alert after grace' in text
+
+
+def test_config_watcher_applies_file_changes(tmp_path):
+    path = tmp_path / 'watched.log'
+    config_file = tmp_path / 'logging.json'
+    config_file.write_text('{"test.watch": {"logfile_path_name": "%s", "level": "INFO"}}' % path)
+    watcher = config_log.watch_config(str(config_file), interval=60, grace_period=0.05)
+    try:
+        logger = logging.getLogger('test.watch')
+        logger.debug('hidden')
+        config_file.write_text('{"test.watch": {"logfile_path_name": "%s", "level": "DEBUG"}}' % path)
+        assert watcher.reload(force=True)
+        time.sleep(0.2)
+        logger.debug('shown')
+    finally:
+        watcher.stop()
+    config_log.teardown('test.watch')
+    text = read(path)
+    assert 'hidden' not in text and 'shown' in text
+    assert watcher.reloads == 2 and watcher.errors == 0
+
+
+# Cost-aware formatting
+
+def test_setup_keeps_record_switches_other_formatters_need(tmp_path):
+    other_path = tmp_path / 'other.log'
+    other_handler = logging.FileHandler(other_path, encoding='utf-8')
+    other_handler.setFormatter(logging.Formatter('%(process)d %(thread)d %(message)s'))
+    other = logging.getLogger('test.switches.other')
+    other.addHandler(other_handler)
+    try:
+        config_log.setup('test.switches', str(tmp_path / 'app.log'))
+        assert logging.logThreads and logging.logProcesses
+        other.warning('formatted')
+    finally:
+        other.removeHandler(other_handler)
+        other_handler.close()
+    assert read(other_path) == f'{os.getpid()} {threading.get_ident()} formatted\n'
+
+
+def test_setup_keeps_caller_lookup_propagated_handlers_need(tmp_path):
+    root_path = tmp_path / 'root.log'
+    root_handler = logging.FileHandler(root_path, encoding='utf-8')
+    root_handler.setFormatter(logging.Formatter('%(filename)s:%(lineno)d %(funcName)s %(message)s'))
+    logging.getLogger().addHandler(root_handler)
+    try:
+        logger = config_log.setup('test.caller', str(tmp_path / 'app.log'), fmt_alert='%(message)s')
+        logger.warning('propagated')
+    finally:
+        logging.getLogger().removeHandler(root_handler)
+        root_handler.close()
+    assert read(root_path).startswith('test_config_log.py:')
+    assert 'test_setup_keeps_caller_lookup_propagated_handlers_need propagated' in read(root_path)
+
+
+def test_setup_skips_caller_lookup_no_format_needs(tmp_path, monkeypatch):
+    logger = logging.getLogger('test.caller.unused')
+    monkeypatch.setattr(logger, 'propagate', False)  # pytest's own root handlers show the caller
+    config_log.setup('test.caller.unused', str(tmp_path / 'app.log'), fmt_alert='%(message)s')
+    assert 'findCaller' in vars(logger)
+    config_log.teardown('test.caller.unused')
+    assert 'findCaller' not in vars(logger)
+
+
+def test_setup_skips_unreferenced_record_fields_and_restores_them(tmp_path):
+    config_log.setup('test.switches.only', str(tmp_path / 'app.log'), fmt_alert='%(message)s')
+    assert not logging.logThreads and not logging.logProcesses and not logging.logMultiprocessing
+    config_log.teardown('test.switches.only')
+    assert logging.logThreads and logging.logProcesses and logging.logMultiprocessing
+
+
+# asyncio mode
+
+def test_reconfigured_asyncio_logger_keeps_tagging_task_names(tmp_path):
+    import asyncio
+
+    path = tmp_path / 'asyncio.log'
+    logger = config_log.setup('test.asyncio', str(path), mode='asyncio')
+    config_log.reconfigure('test.asyncio', str(path), mode='asyncio', level='INFO', grace_period=0.05)
+    time.sleep(0.2)  # the replaced configuration is removed by now
+
+    async def main():
+        await asyncio.create_task(log_warning(), name='worker-task')
+        await config_log.ateardown('test.asyncio')
+
+    async def log_warning():
+        logger.warning('from a task')
+
+    asyncio.run(main())
+    assert '[worker-task]' in read(path)
+
+
+def test_asyncio_mode_tags_records_propagated_from_child_loggers(tmp_path, capfd):
+    import asyncio
+
+    path = tmp_path / 'asyncio_child.log'
+    config_log.setup('test.asyncio.parent', str(path), mode='asyncio')
+    child = logging.getLogger('test.asyncio.parent.child')
+
+    async def main():
+        await asyncio.create_task(log_warning(), name='child-task')
+        await config_log.ateardown('test.asyncio.parent')
+
+    async def log_warning():
+        child.warning('from a child logger')
+
+    asyncio.run(main())
+    assert '[child-task]' in read(path) and 'from a child logger' in read(path)
+    assert 'Logging error' not in capfd.readouterr().err
+
+
+def test_text_formatter_shows_missing_task_name_as_none():
+    formatter = config_log._CompiledFormatter('%(taskName)s %(message)s')
+    record = logging.makeLogRecord({'msg': 'no task'})
+    record.__dict__.pop('taskName', None)
+    assert formatter.format(record) == 'None no task'
+
+
+def test_asyncio_mode_never_blocks_the_event_loop_on_a_full_queue(tmp_path):
+    import asyncio
+
+    logger = config_log.setup('test.asyncio.full', str(tmp_path / 'full.log'), mode='asyncio', queue_size=1)
+    handler = logger.handlers[0]
+    listener = config_log._configs['test.asyncio.full'].listener
+    listener.stop()  # nothing drains the queue now
+
+    async def flood():
+        for i in range(50):
+            logger.info('record %d', i)
+
+    asyncio.run(asyncio.wait_for(flood(), timeout=5))
+    listener.start()  # drain the last record, for teardown
+    assert handler.dropped == 49
+
+
+# Rotation and compression
+
+def test_rotation_burst_compresses_and_prunes_without_errors(tmp_path, capfd):
+    path = tmp_path / 'rotate.log'
+    logger = config_log.setup('test.rotate', str(path), max_bytes=2000, backup_count=2, compress='gzip')
+    for i in range(200):
+        logger.info('record %d of a rotation burst', i)
+    config_log.teardown('test.rotate')
+    config_log._SegmentWorker.get().join()
+    segments = sorted(name for name in os.listdir(tmp_path) if name != 'rotate.log')
+    assert len(segments) == 2 and all(name.endswith('.gz') for name in segments)
+    assert 'Traceback' not in capfd.readouterr().err
+    assert 'record 199 of a rotation burst' in read(path)
+
+
+# Context fields
+
+def test_bound_fields_render_in_text_and_json(tmp_path):
+    text_path, json_path = tmp_path / 'context.log', tmp_path / 'context.jsonl'
+    text_logger = config_log.setup('test.context.text', str(text_path))
+    json_logger = config_log.setup('test.context.json', str(json_path), output_format='json')
+    text_logger.info('unbound')
+    with config_log.bound(request_id='r1', tenant='acme'):
+        text_logger.info('bound')
+        token = config_log.bind(worker=3)
+        json_logger.error('bound too')
+        config_log.unbind(token)
+        assert config_log.get_context() == {'request_id': 'r1', 'tenant': 'acme'}
+    config_log.teardown()
+    text = read(text_path)
+    assert 'INFO: unbound' in text and 'INFO: [request_id=r1 tenant=acme] bound' in text
+    [record] = config_log.read_records(str(json_path))
+    assert record['context'] == {'request_id': 'r1', 'tenant': 'acme', 'worker': 3}
+
+
+def test_context_fields_survive_an_application_record_factory(tmp_path):
+    path = tmp_path / 'factory.log'
+    logger = config_log.setup('test.context.factory', str(path))
+    base_factory = logging.getLogRecordFactory()
+
+    def application_factory(*args, **kwargs):
+        record = base_factory(*args, **kwargs)
+        record.application = True
+        return record
+
+    logging.setLogRecordFactory(application_factory)
+    with config_log.bound(request_id='r2'):
+        logger.info('wrapped factory')
+    logging.setLogRecordFactory(logging.LogRecord)  # replaced outright: nothing bound is shown
+    with config_log.bound(request_id='r3'):
+        logger.info('replaced factory')
+    config_log.teardown('test.context.factory')
+    text = read(path)
+    assert '[request_id=r2] wrapped factory' in text
+    assert 'INFO: replaced factory' in text
+
+
+# Rate limiting
+
+def test_rate_limit_keys_records_by_call_site_without_caller_fields(tmp_path, monkeypatch):
+    path = tmp_path / 'rate.log'
+    monkeypatch.setattr(logging.getLogger('test.rate'), 'propagate', False)  # pytest's root handlers show the caller
+    logger = config_log.setup('test.rate', str(path), fmt_alert='\n%(levelname)s %(message)s', rate_limit=0.001,
+                              rate_burst=1)
+    for _ in range(5):
+        logger.error('repeated failure')  # call site 1
+    for _ in range(5):
+        logger.error('repeated failure')  # call site 2
+    config_log.teardown('test.rate')
+    assert read(path).count('ERROR repeated failure') == 2
+
+
+def test_rate_limit_accepts_unhashable_messages(tmp_path):
+    path = tmp_path / 'unhashable.log'
+    logger = config_log.setup('test.rate.unhashable', str(path), fmt_alert='\n%(message)s', rate_limit=0.001,
+                              rate_burst=1)
+    for _ in range(3):
+        logger.warning({'user': 1})
+    logger.warning(['not', 'a', 'template'])
+    config_log.teardown('test.rate.unhashable')
+    text = read(path)
+    assert text.count("{'user': 1}") == 2  # the first record and the suppression summary
+    assert "['not', 'a', 'template']" in text
+
+
+# Traceback rendering
+
+def _exc_info(function):
+    try:
+        function()
+    except BaseException:
+        return sys.exc_info()
+
+
+def _raise_chained():
+    try:
+        {}['missing']
+    except KeyError as error:
+        raise ValueError('bad value') from error
+
+
+def test_traceback_renderer_matches_logging_and_caches():
+    renderer = config_log._TracebackRenderer(cache_size=8)
+    first, second = _exc_info(_raise_chained), _exc_info(_raise_chained)
+    assert renderer(first) == logging.Formatter().formatException(first)
+    assert renderer(second) == logging.Formatter().formatException(second)
+    assert len(renderer._cache) == 1
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='exception groups need Python 3.11+')
+def test_traceback_renderer_shows_exception_group_members():
+    def raise_group():
+        raise ExceptionGroup('several', [_exc_info(_raise_chained)[1], KeyError('other')])
+
+    exc_info = _exc_info(raise_group)
+    assert config_log._TracebackRenderer()(exc_info) == logging.Formatter().formatException(exc_info)
+
+
+# Query and sidecar index
+
+def test_query_uses_an_incrementally_extended_index(tmp_path):
+    path = tmp_path / 'query.log'
+    logger = config_log.setup('test.query', str(path))
+    other = config_log.setup('test.queryb', str(path))
+    for i in range(30):
+        logger.info('info %d', i)
+        other.error('error %d', i)
+    config_log.flush()
+    assert len(list(config_log.query(str(path)))) == 60
+    index = config_log._LogIndex(str(path))
+    assert index.count == 59  # the last record (possibly still growing) is never indexed
+    logger.warning('late warning')
+    config_log.teardown()
+    warnings = list(config_log.query(str(path), level='WARNING', logger_name='test.query'))
+    assert len(warnings) == 1 and 'late warning' in warnings[0]
+    assert len(list(config_log.query(str(path), logger_name='test.queryb'))) == 30
+    assert config_log._LogIndex(str(path)).count == 60
+    assert list(config_log.query(str(path), since=time.time() + 3600)) == []
+
+
+
+def test_query_answers_when_the_index_cannot_be_written(tmp_path, monkeypatch):
+    path = tmp_path / 'readonly.log'
+    logger = config_log.setup('test.query.readonly', str(path))
+    for i in range(10):
+        logger.info('early %d', i)
+    config_log.flush()
+    assert len(list(config_log.query(str(path)))) == 10  # the index holds the first 9
+    for i in range(10):
+        logger.error('late %d', i)
+    config_log.teardown('test.query.readonly')
+
+    def unwritable(self):
+        raise PermissionError(13, 'Permission denied', self.path)
+
+    monkeypatch.setattr(config_log._LogIndex, '_open_entries', unwritable)
+    assert len(list(config_log.query(str(path)))) == 20
+    assert len(list(config_log.query(str(path), level='ERROR'))) == 10
+    assert config_log._LogIndex(str(path)).count == 9
+    os.unlink(str(path) + '.idx')
+    assert len(list(config_log.query(str(path), level='INFO'))) == 20
+
+# Async mode
+
+def test_async_mode_writes_every_record_by_teardown(tmp_path):
+    path = tmp_path / 'async.log'
+    logger = config_log.setup('test.async', str(path), mode='async', queue_size=10)
+    for i in range(100):
+        logger.info('record %d', i)
+    logger.error('alert')
+    config_log.teardown('test.async')
+    text = read(path)
+    assert all(f'record {i}\n' in text for i in range(100)) and '\nalert \n' in text
+
+
+def test_async_drop_fyi_overflow_drops_debug_info_but_keeps_alerts(tmp_path):
+    path = tmp_path / 'overflow.log'
+    logger = config_log.setup('test.async.overflow', str(path), mode='async', queue_size=1, overflow='drop_fyi')
+    handler = logger.handlers[0]
+    listener = config_log._configs['test.async.overflow'].listener
+    listener.stop()  # nothing drains the queue now
+    logger.info('queued')
+    logger.info('dropped')
+    listener.start()
+    logger.error('kept')
+    config_log.teardown('test.async.overflow')
+    text = read(path)
+    assert 'queued' in text and 'dropped' not in text and 'kept' in text
+    assert handler.dropped_levels == {'INFO': 1}
+
+
+# Idempotent setup
+
+def test_repeat_setup_adds_no_handlers_and_other_options_need_reconfigure(tmp_path):
+    path = tmp_path / 'idempotent.log'
+    logger = config_log.setup('test.idempotent', str(path))
+    handlers = list(logger.handlers)
+    assert config_log.setup('test.idempotent', str(path)) is logger
+    assert logger.handlers == handlers
+    with pytest.raises(ValueError, match='reconfigure'):
+        config_log.setup('test.idempotent', str(path), level='INFO')
+    logger.info('once')
+    config_log.teardown('test.idempotent')
+    assert logger.handlers == [] and read(path).count('once') == 1
+
+
+# Multiprocess collector
+
+def _collector_worker(path: str, number: int) -> None:
+    logger = config_log.setup('test.collector', path, mode='multiprocess')
+    for i in range(50):
+        logger.info('worker %d record %d', number, i)
+    logger.error('worker %d alert', number)
+    config_log.teardown('test.collector')
+
+
+def test_worker_processes_write_through_one_collector(tmp_path):
+    path = str(tmp_path / 'collector.log')
+    collector = config_log.start_collector(path)
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_collector_worker, args=(path, n)) for n in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    collector.stop()
+    stats = collector.stats()
+    assert stats['received'] == 153 and stats['malformed'] == stats['truncated'] == 0
+    text = read(path)
+    assert all(f'worker {n} record {i}\n' in text for n in range(3) for i in range(50))
+    assert len(list(config_log.query(path, level='ERROR'))) == 3
+
+
+def test_command_line_rejects_multiprocess_mode_without_a_log_file(tmp_path):
+    import subprocess
+
+    result = subprocess.run([sys.executable, config_log.__file__, '--mode', 'multiprocess'], cwd=tmp_path,
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 2
+    assert '--mode multiprocess requires --lfpn' in result.stderr and 'Traceback' not in result.stderr
+
+
+# Batched writes
+
+def test_batched_writes_wait_for_a_full_batch_or_an_error(tmp_path):
+    path = tmp_path / 'batch.log'
+    logger = config_log.setup('test.batch', str(path), batch_records=100)
+    for i in range(5):
+        logger.info('pending %d', i)
+    assert read(path) == ''
+    logger.error('written at once')
+    text = read(path)
+    assert 'pending 4' in text and 'written at once' in text
+    logger.info('pending until teardown')
+    config_log.teardown('test.batch')
+    assert 'pending until teardown' in read(path)
+
+
+# Structured output
+
+@pytest.mark.parametrize('output_format', ['json', 'binary'])
+def test_structured_output_reads_back_with_the_format_fields(tmp_path, output_format):
+    path = str(tmp_path / f'structured.{output_format}')
+    logger = config_log.setup('test.structured', path, output_format=output_format)
+    logger.info('line one\nline "two"')
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.error('failed', exc_info=True)
+    config_log.teardown('test.structured')
+    info, error = config_log.read_records(path)
+    assert info['message'] == 'line one\nline "two"' and info['levelname'] == 'INFO'
+    assert set(info) == {'asctime', 'name', 'levelname', 'context', 'message'}
+    assert error['lineno'] > 0 and error['exc_text'].endswith('ZeroDivisionError: division by zero')
+
+
+
+def test_unsupported_binary_field_fails_before_opening_the_log_file(tmp_path):
+    path = str(tmp_path / 'unsupported.bin')
+    with pytest.raises(ValueError):
+        config_log.setup('test.structured.bad', path, output_format='binary', fmt_fyi='%(custom)s')
+    assert not os.path.exists(path)
+    logger = config_log.setup('test.structured.bad', path, max_bytes=1000)  # no file left open before
+    logger.info('after the failed setup')
+    config_log.teardown('test.structured.bad')
+    assert 'after the failed setup' in read(path)
+
+# Benchmark suite
+
+def test_benchmark_reports_throughput_latency_and_regressions():
+    import bench_config_log
+
+    result = bench_config_log.run_benchmark('file', 'sync', 200)
+    assert result['records'] == 200 and result['records_per_s'] > 0
+    assert set(result['latency_ns']) == {'p50', 'p90', 'p99', 'p999', 'max'}
+    baseline = {'results': [dict(result, records_per_s=result['records_per_s'] * 10)]}
+    assert bench_config_log.compare([result], baseline, 0.2)[0]['scenario'] == 'file'
+    assert bench_config_log.compare([result], {'results': [result]}, 0.2) == []
+
+
+# Self-metrics
+
+def test_metrics_count_records_bytes_and_times_per_handler(tmp_path):
+    path = tmp_path / 'metrics.log'
+    metrics_file = tmp_path / 'metrics.json'
+    logger = config_log.setup('test.metrics', str(path), metrics_file=str(metrics_file))
+    for _ in range(3):
+        logger.info('counted')
+    logger.warning('counted too')
+    metrics = config_log.get_metrics('test.metrics')
+    assert metrics['records'] == {'INFO': 3, 'WARNING': 1}
+    fyi, alert = metrics['handlers']['fyi'], metrics['handlers']['alert']
+    assert fyi['emitted'] == {'INFO': 3} and alert['emitted'] == {'WARNING': 1}
+    assert fyi['emit_ns']['count'] == 3 and fyi['bytes'] > 0
+    config_log.teardown('test.metrics')
+    assert config_log.get_metrics('test.metrics') is None
+    assert '"test.metrics"' in read(metrics_file)
+
+
+def test_metrics_are_off_by_default(tmp_path):
+    logger = config_log.setup('test.metrics.off', str(tmp_path / 'off.log'))
+    assert config_log.get_metrics('test.metrics.off') is None
+    assert 'emit' not in vars(logger.handlers[0]) and 'filter' not in vars(logger)
+
+
+# Level and lazy messages
+
+def test_level_gates_records_and_lazy_values_stay_unevaluated(tmp_path):
+    path = tmp_path / 'level.log'
+    calls = []
+    logger = config_log.setup('test.level', str(path), level='INFO')
+    logger.debug('hidden %s', config_log.lazy(calls.append, 'debug'))
+    logger.info('shown %s', config_log.lazy(lambda: calls.append('info') or 'value'))
+    config_log.teardown('test.level')
+    assert calls == ['info']
+    assert 'hidden' not in read(path) and 'shown value' in read(path)
+
+
+def test_level_defaults_to_the_environment_variable(tmp_path, monkeypatch):
+    monkeypatch.setenv(config_log.LEVEL_ENV_VAR, 'warning')
+    assert config_log.setup('test.level.env', str(tmp_path / 'env.log')).level == logging.WARNING
+    with pytest.raises(ValueError):
+        config_log.setup('test.level.bad', str(tmp_path / 'bad.log'), level='LOUD')
+
+
+# Flight recorder
+
+def test_flight_recorder_writes_recent_detail_only_before_an_alert(tmp_path):
+    path = tmp_path / 'recorder.log'
+    logger = config_log.setup('test.recorder', str(path), flight_recorder_bytes=4096)
+    logger.debug('detail one')
+    logger.info('detail two')
+    config_log.flush('test.recorder')
+    assert read(path) == ''
+    ring = [data.decode('utf-8') for data in config_log.read_flight_recorder(str(path) + '.ring')]
+    assert len(ring) == 2 and 'detail one' in ring[0] and 'detail two' in ring[1]
+
+    logger.warning('trouble')
+    logger.warning('more trouble')
+    config_log.teardown('test.recorder')
+    text = read(path)
+    assert text.count('detail one') == 1 and text.count('detail two') == 1  # written once, not per alert
+    assert text.index('detail one') < text.index('detail two') < text.index('trouble')
+
+
+# Import time
+
+def test_importing_setup_leaves_optional_feature_modules_unimported():
+    import bench_import_time
+    imported = bench_import_time.import_times('from config_log import setup')
+    assert 'config_log' in imported
+    assert [name for name in bench_import_time.DEFERRED_MODULES if name in imported] == []
+
+
+# Compaction
+
+def test_compact_merges_files_in_time_order_and_summarizes(tmp_path):
+    paths = [str(tmp_path / f'{name}.log') for name in ('a', 'b', 'c')]
+    for number, path in enumerate(paths):
+        logger = config_log.setup('test.compact', path)
+        logger.info('file %d', number)
+        for _ in range(2):  # the same alert block twice
+            try:
+                raise KeyError('missing')
+            except KeyError:
+                logger.exception('lookup failed')
+        config_log.teardown('test.compact')
+    output = str(tmp_path / 'fleet.log.gz')
+    summary = config_log.compact(paths, output, workers=2, fan_in=2)
+    assert summary['files'] == 3 and summary['records'] == 9
+    assert summary['levels'] == {'INFO': 3, 'ERROR': 6}
+    assert summary['loggers'] == {'test.compact': 9} and summary['exceptions'] == {'KeyError': 6}
+    assert summary['duplicates'] == 5  # every repeat of the one alert block, across files too
+
+    import gzip
+    with gzip.open(output, 'rb') as output_file:
+        data = output_file.read()
+    assert data.index(b'file 0') < data.index(b'file 1') < data.index(b'file 2')
+    records = list(config_log._text_records(data))
+    assert len(records) == 9
+    assert [created for _, _, created, _, _ in records] == sorted(created for _, _, created, _, _ in records)